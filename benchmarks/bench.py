@@ -0,0 +1,433 @@
+"""Benchmarks over the recorded telemetry corpus.
+
+    python benchmarks/bench.py run -o before.json
+    python benchmarks/bench.py run -o after.json
+    python benchmarks/bench.py compare before.json after.json --threshold 0.1
+
+``run`` times telemetry loading, derived columns, interval resolution, path
+errors, odometry replay, wheel calibration, the plot methods on the Agg
+backend and the keeper trace decoder over the real logs in
+notebooks/trajectory/data and notebooks/tcr/data, and over synthetic logs
+tiled from a real one. It also times LivePlot frames over a full 60 s window
+and exits non-zero when a plot falls below ``LIVE_FPS``. ``compare`` exits
+non-zero when any benchmark's median got slower by more than the threshold.
+``imports`` fails when a ``motion`` submodule takes longer than its budget to
+import in a fresh interpreter, or loads a dependency it should defer, and
+test_imports.py runs the same check under pytest.
+"""
+import argparse
+import gc
+import itertools
+import json
+import pickle
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+NOTEBOOKS = ROOT / "notebooks"
+sys.path[:0] = [str(ROOT), str(NOTEBOOKS / "keeper"), str(NOTEBOOKS / "trajectory")]
+
+import keeper  # noqa: E402
+import live  # noqa: E402
+from motion.odometry import OdometryReplay, WheelCalibration  # noqa: E402
+from motion.telemetry import (  # noqa: E402
+    DerivedColumns,
+    Telemetry,
+    TrajectoryTelemetry,
+)
+
+TRAJECTORY_DATA = NOTEBOOKS / "trajectory" / "data"
+TCR_DATA = NOTEBOOKS / "tcr" / "data"
+KEEPER_DATA = NOTEBOOKS / "keeper" / "data"
+REFERENCE_LOG = TRAJECTORY_DATA / "tcr-0525-183653.csv"
+SCALES = (10, 100)
+# seconds for a cold import in a fresh interpreter, and modules it must not load
+IMPORT_BUDGETS = {
+    "motion": (0.02, ("numpy", "pandas", "matplotlib", "wpimath")),
+    "motion.inventory": (0.05, ("numpy", "pandas", "matplotlib", "wpimath")),
+    "motion.path": (0.3, ("pandas", "matplotlib", "wpimath")),
+    "motion.odometry": (1.0, ("matplotlib", "wpimath")),
+    "motion.catalog": (1.0, ("matplotlib", "wpimath")),
+    "motion.sim": (0.3, ("pandas", "matplotlib", "wpimath")),
+    "motion.telemetry": (1.0, ("matplotlib", "wpimath")),
+}
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps([time.perf_counter() - start, sorted(sys.modules)]))
+"""
+INTERVAL_PROPERTIES = ("segments", "start", "end", "interval")
+PLOTS = ("plot_trajectory", "plot_error", "plot_velocity", "plot_yaw")
+# frames per second a LivePlot must sustain over a full window
+LIVE_FPS = 30
+LIVE_WINDOW = 60_000
+LIVE_PLOTS = ("trajectory", "velocity", "error", "yaw")
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "repeat": repeat,
+    }
+
+
+def loadable(paths, cls):
+    """The logs ``cls`` can load, skipping empty and header-only files."""
+    logs = []
+    for path in paths:
+        try:
+            t = cls(path, cache=False)
+        except (pd.errors.EmptyDataError, KeyError):
+            continue
+        if len(t.df) and "timestamp" in t.df:
+            logs.append(path)
+    return logs
+
+
+def synthetic_log(directory, scale):
+    """The reference log repeated ``scale`` times with continuing timestamps."""
+    df = pd.read_csv(REFERENCE_LOG)
+    span = df["timestamp"].iloc[-1] - df["timestamp"].iloc[0] + 5
+    tiled = pd.concat([df] * scale, ignore_index=True)
+    tiled["timestamp"] += np.repeat(np.arange(scale) * span, len(df))
+    path = Path(directory) / f"synthetic-x{scale}.csv"
+    tiled.to_csv(path, index=False)
+    return path
+
+
+def action_body(scale):
+    """An action response with the traces of every archived keeper pickle."""
+    traces = []
+    offset = 0
+    for path in sorted(KEEPER_DATA.glob("*.pickle")):
+        with open(path, "rb") as f:
+            df = pickle.load(f).dataframe
+        long = df.stack().reset_index()
+        long.columns = ["millis", "measure", "value"]
+        long["millis"] += offset
+        offset = long["millis"].max() + 1
+        traces.append(long)
+    traces = pd.concat(traces, ignore_index=True)
+    span = traces["millis"].max() + 1
+    traces = pd.concat(
+        [traces.assign(millis=traces["millis"] + i * span) for i in range(scale)],
+        ignore_index=True,
+    )
+    body = {
+        "id": 1,
+        "name": "benchmark",
+        "meta": {"description": "benchmark"},
+        "created_at": "2021-05-03T15:39:46.877000-04:00",
+        "traces": traces.values.tolist(),
+    }
+    return json.dumps(body)
+
+
+def decode(body, chunk_size=keeper.CHUNK_SIZE):
+    decoder = keeper.TraceDecoder()
+    for i in range(0, len(body), chunk_size):
+        decoder.feed(body[i : i + chunk_size])
+    decoder.close()
+    return decoder.dataframe()
+
+
+def live_client():
+    """A client whose buffer holds ``LIVE_WINDOW`` of the reference log, tiled."""
+    subscription = TrajectoryTelemetry(REFERENCE_LOG, cache=False).subscription()
+    client = live.TelemetryClient(subscription)
+    # the samples a FakeTelemetryServer would send
+    server = live.FakeTelemetryServer(REFERENCE_LOG, subscription)
+    values = server.df.reindex(columns=server.columns).to_numpy(np.float64)
+    timestamps = server.df["timestamp"].to_numpy()
+    span = timestamps[-1] - timestamps[0] + 5
+    tiles = LIVE_WINDOW // span + 1
+    for tile in range(tiles):
+        for timestamp, row in zip(timestamps + tile * span, values):
+            client.buffer.append(timestamp, row)
+    return client, timestamps + tiles * span, values
+
+
+def live_benchmarks(kind, repeat):
+    """Frame times of a LivePlot receiving the samples of one frame per update."""
+    client, timestamps, values = live_client()
+    interval = np.median(np.diff(timestamps))
+    per_frame = max(1, round(1000 / LIVE_FPS / interval))
+    fig, ax = plt.subplots()
+    plot = live.LivePlot(client, kind, window=LIVE_WINDOW, ax=ax)
+    plot.update()
+    samples = iter(zip(timestamps, values))
+
+    def frame():
+        for timestamp, row in itertools.islice(samples, per_frame):
+            client.buffer.append(timestamp, row)
+        plot.update()
+
+    result = timed(frame, min(repeat * 10, len(timestamps) // per_frame))
+    plt.close(fig)
+    return result
+
+
+def telemetry_benchmarks(name, paths, cls, repeat):
+    results = {}
+    results[f"{name}/load_csv"] = timed(
+        lambda: [cls(path, cache=False) for path in paths], repeat
+    )
+    for path in paths:
+        cls(path)  # prime the cache
+    results[f"{name}/load_cached"] = timed(
+        lambda: [cls(path) for path in paths], repeat
+    )
+
+    logs = [cls(path) for path in paths]
+    results[f"{name}/resample"] = timed(lambda: [t.resample() for t in logs], repeat)
+    results[f"{name}/jitter"] = timed(lambda: [t.jitter() for t in logs], repeat)
+    if cls is not TrajectoryTelemetry:
+        return results
+
+    def derived():
+        for t in logs:
+            columns = DerivedColumns(t)
+            for column in columns:
+                columns[column]
+
+    def intervals():
+        for t in logs:
+            for prop in INTERVAL_PROPERTIES:
+                t.__dict__.pop(prop, None)
+            for prop in INTERVAL_PROPERTIES:
+                getattr(t, prop)
+
+    results[f"{name}/derived"] = timed(derived, repeat)
+    results[f"{name}/interval"] = timed(intervals, repeat)
+    results[f"{name}/path_errors"] = timed(
+        lambda: [t.path_errors(s.interval) for t in logs for s in t.segments], repeat
+    )
+    replayable = [t for t in logs if not t.df.filter(regex=r"^t\d+_velocity$").empty]
+    if replayable:
+        results[f"{name}/odometry_replay"] = timed(
+            lambda: [OdometryReplay(t).drift for t in replayable], repeat
+        )
+        calibration = WheelCalibration(OdometryReplay(t) for t in replayable)
+        diameters = np.linspace(2.5, 3.5, 10_000)
+        results[f"{name}/wheel_calibration"] = timed(
+            lambda: calibration.rms_drift(diameters), repeat
+        )
+    for plot in PLOTS:
+
+        def draw(plot=plot):
+            for t in logs:
+                fig, ax = plt.subplots()
+                getattr(t, plot)(interval=t.interval, ax=ax)
+                fig.canvas.draw()
+                plt.close(fig)
+
+        results[f"{name}/{plot}"] = timed(draw, repeat)
+    return results
+
+
+def run(args):
+    pattern = re.compile(args.filter) if args.filter else None
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # keep benchmark cache entries out of the notebooks' cache
+        Telemetry.cache_dir = Path(tmp) / "cache"
+        sets = [
+            (
+                "trajectory",
+                loadable(
+                    sorted(TRAJECTORY_DATA.glob("tcr-*.csv")), TrajectoryTelemetry
+                ),
+                TrajectoryTelemetry,
+            ),
+            ("tcr", loadable(sorted(TCR_DATA.glob("tcr-*.csv")), Telemetry), Telemetry),
+        ]
+        sets += [
+            (f"synthetic-x{scale}", [synthetic_log(tmp, scale)], TrajectoryTelemetry)
+            for scale in args.scale
+        ]
+        for name, paths, cls in sets:
+            if pattern and not pattern.search(name):
+                continue
+            print(f"{name}: {len(paths)} logs", file=sys.stderr)
+            results.update(telemetry_benchmarks(name, paths, cls, args.repeat))
+
+        for scale in (1, *args.scale):
+            name = f"keeper/trace_decode-x{scale}"
+            if pattern and not pattern.search(name):
+                continue
+            print(name, file=sys.stderr)
+            body = action_body(scale)
+            results[name] = timed(lambda: decode(body), args.repeat)
+
+        failures = 0
+        for kind in LIVE_PLOTS:
+            name = f"live/{kind}_frame"
+            if pattern and not pattern.search(name):
+                continue
+            results[name] = live_benchmarks(kind, args.repeat)
+            fps = 1 / results[name]["median"]
+            status = "ok" if fps >= LIVE_FPS else "FAIL"
+            failures += status == "FAIL"
+            print(
+                f"{name}: {fps:.1f} fps, target {LIVE_FPS}  {status}", file=sys.stderr
+            )
+
+    if failures:
+        print(f"{failures} live plots below {LIVE_FPS} fps", file=sys.stderr)
+    report = {"meta": metadata(), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 1 if failures else 0
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def compare(args):
+    base = json.loads(Path(args.base).read_text())["results"]
+    new = json.loads(Path(args.new).read_text())["results"]
+    regressions = 0
+    width = max(map(len, base.keys() | new.keys()), default=0)
+    for name in sorted(base.keys() | new.keys()):
+        if name not in base or name not in new:
+            print(f"{name:<{width}}  {'only in ' + ('new' if name in new else 'base')}")
+            continue
+        before, after = base[name]["median"], new[name]["median"]
+        change = after / before - 1.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  improved"
+        print(
+            f"{name:<{width}}  {before * 1000:10.2f} ms  {after * 1000:10.2f} ms"
+            f"  {change:+7.1%}{flag}"
+        )
+    return 1 if regressions else 0
+
+
+def probe_import(module, repeat=3):
+    """Best cold import time of ``module`` over ``repeat`` fresh interpreters,
+    and the top level packages it loaded.
+    """
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(module=module)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        elapsed, modules = json.loads(out)
+        times.append(elapsed)
+    return min(times), {m.split(".")[0] for m in modules}
+
+
+def imports(args):
+    """Check cold import time and lazy loading of the motion package."""
+    failures = 0
+    for module, (budget, forbidden) in IMPORT_BUDGETS.items():
+        best, packages = probe_import(module, args.repeat)
+        loaded = sorted(packages & set(forbidden))
+        status = "ok"
+        if best > budget or loaded:
+            status = "FAIL"
+            failures += 1
+        print(
+            f"{module:<18} {best * 1000:8.1f} ms  budget {budget * 1000:6.0f} ms"
+            f"  {status}{'  loads ' + ', '.join(loaded) if loaded else ''}"
+        )
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", help="write results JSON here")
+    run_parser.add_argument("-r", "--repeat", type=int, default=5)
+    run_parser.add_argument(
+        "-s",
+        "--scale",
+        type=int,
+        nargs="*",
+        default=list(SCALES),
+        help="synthetic log lengths, as multiples of the reference log",
+    )
+    run_parser.add_argument("-k", "--filter", help="only benchmark sets matching")
+
+    compare_parser = commands.add_parser("compare", help="compare two results")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown of the median flagged as a regression",
+    )
+
+    imports_parser = commands.add_parser(
+        "imports", help="check the motion package import-time budget"
+    )
+    imports_parser.add_argument("-r", "--repeat", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    if args.command == "imports":
+        return imports(args)
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import pytest
+
+import bench
+
+
+@pytest.mark.parametrize("module", list(bench.IMPORT_BUDGETS))
+def test_import_budget(module):
+    budget, forbidden = bench.IMPORT_BUDGETS[module]
+    best, packages = bench.probe_import(module)
+
+    loaded = sorted(packages & set(forbidden))
+    assert not loaded, f"{module} loads {', '.join(loaded)}"
+    assert best <= budget, f"{module} imports in {best:.3f} s, budget {budget} s"
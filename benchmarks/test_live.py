@@ -0,0 +1,9 @@
+import pytest
+
+import bench
+
+
+@pytest.mark.parametrize("kind", bench.LIVE_PLOTS)
+def test_live_plot_frame_rate(kind):
+    fps = 1 / bench.live_benchmarks(kind, repeat=5)["median"]
+    assert fps >= bench.LIVE_FPS, f"{kind} plot at {fps:.1f} fps"
@@ -0,0 +1,90 @@
+"""Trajectory telemetry analysis and path-following simulation.
+
+Submodules are imported on first attribute access, so ``import motion`` is
+free and ``from motion import Subscription`` loads only the inventory:
+
+- ``motion.inventory``: measures, inventory and subscriptions, stdlib only
+- ``motion.telemetry``: telemetry logs, NumPy and pandas
+- ``motion.path``: spatial index over reference paths, NumPy
+- ``motion.odometry``: swerve odometry replay and wheel calibration, NumPy and pandas
+- ``motion.catalog``: SQLite catalog of per-run metadata, NumPy and pandas
+- ``motion.sim``: simulation and spline math, NumPy, wpimath on first use
+- ``motion.plot``: plotting helpers, matplotlib
+- ``motion.instrument``: opt-in timing spans over the modules above
+"""
+import importlib
+
+SUBMODULES = (
+    "inventory",
+    "telemetry",
+    "path",
+    "odometry",
+    "catalog",
+    "sim",
+    "plot",
+    "instrument",
+)
+
+_EXPORTS = {
+    "inventory": (
+        "Measure",
+        "Measurable",
+        "Inventory",
+        "Subscription",
+        "column_name",
+        "column_names",
+    ),
+    "telemetry": (
+        "Telemetry",
+        "TrajectoryTelemetry",
+        "TelemetryCorpus",
+        "DerivedColumns",
+        "Segment",
+        "Column",
+        "resample",
+    ),
+    "path": (
+        "PathIndex",
+        "Projection",
+        "error_stats",
+    ),
+    "odometry": (
+        "OdometryReplay",
+        "WheelCalibration",
+        "MODULE_LOCATIONS",
+        "inverse_kinematics",
+    ),
+    "catalog": ("RunCatalog",),
+    "sim": (
+        "HolonomicDriveController",
+        "BatchSimulation",
+        "QuinticSplines",
+        "STATE_DTYPE",
+        "state_array",
+        "trajectory_arrays",
+    ),
+    "plot": (
+        "Decimation",
+        "minmax_indices",
+        "fill_verts",
+        "plot_swerve",
+        "plot_trajectories",
+        "plot_splines",
+    ),
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULE_OF)
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _MODULE_OF:
+        module = importlib.import_module(f"{__name__}.{_MODULE_OF[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted({*globals(), *SUBMODULES, *_MODULE_OF})
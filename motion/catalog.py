@@ -0,0 +1,230 @@
+"""Per-run metadata of telemetry logs in a SQLite catalog.
+
+A catalog answers "which runs" without opening a CSV::
+
+    catalog = RunCatalog()
+    catalog.update("data")
+    catalog.update("../tcr/data", telemetry=Telemetry)
+    catalog.query("traj_vel_max >= 2 AND end_error < 0.05")
+
+``update`` only summarizes logs that are new or changed since the last
+update, and drops rows of logs that are gone. Empty and header-only logs
+get a row with their ``status`` instead of raising.
+"""
+import csv
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .inventory import CACHE_DIR
+from .telemetry import TrajectoryTelemetry, _run_summary
+
+CATALOG = CACHE_DIR / "catalog.sqlite"
+
+# bumped when COLUMNS changes, which rebuilds the catalog
+SCHEMA_VERSION = 1
+
+PATH_ERROR_COLUMNS = tuple(
+    f"{error}_{stat}"
+    for error in ("cross_track", "along_track", "heading_error")
+    for stat in ("rms", "p95", "max")
+)
+COLUMNS = {
+    "path": "TEXT PRIMARY KEY",
+    "name": "TEXT",
+    "directory": "TEXT",
+    "size": "INTEGER",
+    "mtime_ns": "INTEGER",
+    "params": "TEXT",
+    "kind": "TEXT",
+    "status": "TEXT",
+    "error": "TEXT",
+    "columns": "TEXT",
+    "samples": "INTEGER",
+    "first_timestamp": "INTEGER",
+    "last_timestamp": "INTEGER",
+    "duration_ms": "INTEGER",
+    "start": "INTEGER",
+    "end": "INTEGER",
+    "segments": "INTEGER",
+    "traj_vel_max": "REAL",
+    "drive_mps_max": "REAL",
+    "traj_x": "REAL",
+    "traj_y": "REAL",
+    "odom_x": "REAL",
+    "odom_y": "REAL",
+    "odom_deg": "REAL",
+    "end_error": "REAL",
+    "x_error_max": "REAL",
+    "x_error_rms": "REAL",
+    "y_error_max": "REAL",
+    "y_error_rms": "REAL",
+    **{name: "REAL" for name in PATH_ERROR_COLUMNS},
+}
+
+
+def _value(value):
+    """A NumPy scalar as the Python number sqlite3 stores."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _peek(path):
+    """The header of a CSV log and whether any row follows it."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        return header, next(reader, None) is not None
+
+
+def _catalog_run(path, telemetry, kwargs):
+    """The catalog row of one log."""
+    header, has_rows = _peek(path)
+    row = {"kind": telemetry.__name__, "columns": json.dumps(header)}
+    if not header:
+        return {**row, "status": "empty"}
+    if not has_rows:
+        return {**row, "status": "header_only", "samples": 0}
+    try:
+        t = telemetry(path, **kwargs)
+        df = t.df
+        timestamps = t.timestamps
+        row.update(
+            columns=json.dumps(list(df.columns)),
+            samples=len(df),
+            first_timestamp=timestamps[0],
+            last_timestamp=timestamps[-1],
+            duration_ms=timestamps[-1] - timestamps[0],
+        )
+        if isinstance(t, TrajectoryTelemetry):
+            summary = _run_summary(t)
+            row.update(summary)
+            row["end_error"] = np.hypot(
+                summary["odom_x"] - summary["traj_x"],
+                summary["odom_y"] - summary["traj_y"],
+            )
+            if not df.filter(regex=r"^t\d+_velocity$").empty:
+                row["drive_mps_max"] = np.nanmax(t.derived["drive_mps"][t.interval])
+    except Exception as e:  # a bad log becomes a flagged row, not a failed update
+        return {**row, "status": "error", "error": f"{type(e).__name__}: {e}"}
+    return {**row, "status": "ok"}
+
+
+class RunCatalog:
+    """A SQLite table of telemetry runs, one row per log file.
+
+    Rows are keyed by the resolved log path and are current while the
+    log's size and mtime and the loading parameters are unchanged.
+    """
+
+    def __init__(self, path=CATALOG, max_workers=None):
+        self.path = Path(path)
+        self.max_workers = max_workers
+        self.updated = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                db.execute("DROP TABLE IF EXISTS runs")
+                columns = ", ".join(
+                    f'"{name}" {kind}' for name, kind in COLUMNS.items()
+                )
+                db.execute(f"CREATE TABLE runs ({columns})")
+                db.execute("CREATE INDEX runs_name ON runs (name)")
+                db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def update(
+        self, directory, pattern="tcr-*.csv", telemetry=TrajectoryTelemetry, **kwargs
+    ):
+        """Catalog new and changed logs in ``directory``, returning their names.
+
+        ``telemetry`` is the class the logs are loaded with, and ``kwargs``
+        are passed to it.
+        """
+        directory = Path(directory).resolve()
+        params = json.dumps({"kind": telemetry.__name__, **kwargs}, sort_keys=True)
+        paths = sorted(directory.glob(pattern))
+        with self._connect() as db:
+            known = {
+                path: tuple(key)
+                for path, *key in db.execute(
+                    "SELECT path, size, mtime_ns, params FROM runs WHERE directory = ?",
+                    (str(directory),),
+                )
+            }
+
+        stale = {}
+        for path in paths:
+            stat = path.stat()
+            key = (stat.st_size, stat.st_mtime_ns, params)
+            if known.get(str(path)) != key:
+                stale[path] = key
+
+        if len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    path: executor.submit(_catalog_run, path, telemetry, kwargs)
+                    for path in stale
+                }
+                rows = {path: future.result() for path, future in futures.items()}
+        else:
+            rows = {path: _catalog_run(path, telemetry, kwargs) for path in stale}
+
+        names = list(COLUMNS)
+        quoted = ", ".join(f'"{name}"' for name in names)
+        insert = f"INSERT OR REPLACE INTO runs ({quoted}) VALUES ({', '.join('?' * len(names))})"
+        with self._connect() as db:
+            gone = set(known) - {str(path) for path in paths}
+            db.executemany(
+                "DELETE FROM runs WHERE path = ?", [(path,) for path in gone]
+            )
+            for path, row in rows.items():
+                size, mtime_ns, _ = stale[path]
+                row = {
+                    **row,
+                    "path": str(path),
+                    "name": path.stem,
+                    "directory": str(directory),
+                    "size": size,
+                    "mtime_ns": mtime_ns,
+                    "params": params,
+                }
+                db.execute(insert, [_value(row.get(name)) for name in names])
+        self.updated = [path.stem for path in stale]
+        return self.updated
+
+    def query(self, where=None, params=()):
+        """Runs matching an SQL ``where`` clause, indexed by name."""
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += f" WHERE {where}"
+        with self._connect() as db:
+            df = pd.read_sql_query(sql + " ORDER BY directory, name", db, params=params)
+        return df.set_index("name")
+
+    def flagged(self):
+        """Runs that are empty, header-only or failed to load."""
+        return self.query("status != 'ok'")
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def __repr__(self):
+        return f"RunCatalog({str(self.path)!r},runs={len(self)})"
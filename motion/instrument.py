@@ -0,0 +1,289 @@
+"""Opt-in timing spans for the analysis and simulation code.
+
+Nothing is instrumented until ``enable``: it wraps the ``TARGETS`` of the
+``motion`` package and ``keeper`` modules that are already imported,
+and ``disable`` puts the originals back, so there is no cost when profiling
+is off. In a notebook::
+
+    from motion import instrument
+    from trajectory import *
+
+    with instrument.profile(memory=True) as p:
+        t = TrajectoryTelemetry("data/tcr-0525-183653.csv", cache=False)
+        t.plot_velocity()
+    p.summary()
+    p.chrome_trace("trace.json")  # open in chrome://tracing or ui.perfetto.dev
+
+Methods are patched on their classes, so existing instances are covered.
+Module functions are replaced in their module, so enable profiling before
+``from motion.plot import plot_trajectories`` style imports to time those.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import cached_property
+
+import pandas as pd
+
+TARGETS = {
+    "pandas": ["read_csv"],
+    "motion.inventory": ["Inventory.load"],
+    "motion.telemetry": [
+        "Telemetry.__init__",
+        "Telemetry._load",
+        "Telemetry._read_csv",
+        "Telemetry.resample",
+        "Telemetry.jitter",
+        "TrajectoryTelemetry.__init__",
+        "TrajectoryTelemetry._prepare",
+        "TrajectoryTelemetry.segments",
+        "TrajectoryTelemetry.end_pose",
+        "TrajectoryTelemetry.make_interval",
+        "TrajectoryTelemetry.path_errors",
+        "TrajectoryTelemetry.plot_trajectory",
+        "TrajectoryTelemetry.plot_error",
+        "TrajectoryTelemetry.plot_velocity",
+        "TrajectoryTelemetry.plot_yaw",
+        "DerivedColumns.__getitem__",
+        "_read_cache",
+        "_write_cache",
+        "_summarize_run",
+        "_run_summary",
+    ],
+    "motion.path": ["PathIndex.__init__", "PathIndex.project"],
+    "motion.odometry": [
+        "OdometryReplay.directions",
+        "OdometryReplay._chassis",
+        "OdometryReplay._displacement",
+        "WheelCalibration.__init__",
+    ],
+    "motion.catalog": ["RunCatalog.update", "RunCatalog.query", "_catalog_run"],
+    "keeper": [
+        "Activity.__init__",
+        "Action.__init__",
+        "ArchivedAction.dataframe",
+        "ActionArchive.add",
+        "TraceDecoder.feed",
+        "TraceDecoder.dataframe",
+        "fetch_actions",
+        "migrate_pickles",
+        "_get_action",
+    ],
+    "motion.sim": [
+        "HolonomicDriveController.calculate",
+        "BatchSimulation.__init__",
+        "QuinticSplines.evaluate",
+        "QuinticSplines.sample_adaptive",
+        "state_array",
+    ],
+    "motion.plot": [
+        "Decimation.update",
+        "plot_swerve",
+        "plot_trajectories",
+        "plot_splines",
+    ],
+}
+
+_profiler = None
+
+
+class Profiler:
+    """Nested timing spans recorded per thread, with optional peak memory."""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = []
+        self.origin = time.perf_counter_ns()
+        self.patched = []
+        self.started_tracemalloc = False
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        frame = {"name": name, "depth": len(stack), "peak": 0, "current": 0}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent["peak"] = max(parent["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["current"] = current
+        stack.append(frame)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            stack.pop()
+            record = {
+                "name": name,
+                "start": (start - self.origin) / 1e9,
+                "duration": (end - start) / 1e9,
+                "depth": frame["depth"],
+                "parent": parent["name"] if parent is not None else None,
+                "thread": threading.get_ident(),
+            }
+            if self.memory:
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                record["peak_memory"] = peak - frame["current"]
+                if parent is not None:
+                    parent["peak"] = max(parent["peak"], peak)
+            self.records.append(record)
+
+    def wrap(self, fn, name):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    def dataframe(self):
+        """One row per span, in completion order, with self time."""
+        df = pd.DataFrame(self.records)
+        if df.empty:
+            return df
+        df["self_duration"] = df["duration"] - _child_time(df)
+        return df
+
+    def summary(self):
+        """Call counts and total, self, mean and max time per span name."""
+        df = self.dataframe()
+        if df.empty:
+            return df
+        aggregations = {
+            "count": ("duration", "size"),
+            "total": ("duration", "sum"),
+            "self_time": ("self_duration", "sum"),
+            "mean": ("duration", "mean"),
+            "max": ("duration", "max"),
+        }
+        if self.memory:
+            aggregations["peak_memory"] = ("peak_memory", "max")
+        return (
+            df.groupby("name")
+            .agg(**aggregations)
+            .sort_values("self_time", ascending=False)
+        )
+
+    def chrome_trace(self, path):
+        """Write the spans in Chrome trace event format."""
+        pid = os.getpid()
+        events = []
+        for record in self.records:
+            event = {
+                "name": record["name"],
+                "ph": "X",
+                "ts": record["start"] * 1e6,
+                "dur": record["duration"] * 1e6,
+                "pid": pid,
+                "tid": record["thread"],
+            }
+            if "peak_memory" in record:
+                event["args"] = {"peak_memory": record["peak_memory"]}
+            events.append(event)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def __repr__(self):
+        return f"Profiler(spans={len(self.records)},memory={self.memory})"
+
+
+def _child_time(df):
+    """Total duration of each span's direct children.
+
+    Spans complete children first, so a span's children are the deeper
+    records on its thread since its previous sibling or ancestor completed.
+    """
+    child_time = [0.0] * len(df)
+    pending = {}
+    for i, (thread, depth, duration) in enumerate(
+        zip(df["thread"], df["depth"], df["duration"])
+    ):
+        totals = pending.setdefault(thread, {})
+        child_time[i] = totals.pop(depth + 1, 0.0)
+        totals[depth] = totals.get(depth, 0.0) + duration
+    return pd.Series(child_time, index=df.index)
+
+
+def _wrap_attribute(profiler, raw, name):
+    if isinstance(raw, cached_property):
+        wrapped = cached_property(profiler.wrap(raw.func, name))
+        wrapped.attrname = raw.attrname
+        return wrapped
+    if isinstance(raw, property):
+        return property(profiler.wrap(raw.fget, name), raw.fset, raw.fdel, raw.__doc__)
+    if isinstance(raw, (classmethod, staticmethod)):
+        return type(raw)(profiler.wrap(raw.__func__, name))
+    return profiler.wrap(raw, name)
+
+
+def enable(memory=False, targets=TARGETS):
+    """Start recording spans for the targets of already imported modules."""
+    global _profiler
+    if _profiler is not None:
+        disable()
+    profiler = Profiler(memory=memory)
+    for module_name, attributes in targets.items():
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for attribute in attributes:
+            *owner_path, name = attribute.split(".")
+            owner = module
+            for part in owner_path:
+                owner = getattr(owner, part, None)
+            if owner is None:
+                continue
+            raw = owner.__dict__.get(name) if owner_path else getattr(owner, name, None)
+            if raw is None:
+                continue
+            span_name = f"{module_name}.{attribute}"
+            setattr(owner, name, _wrap_attribute(profiler, raw, span_name))
+            profiler.patched.append((owner, name, raw))
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        profiler.started_tracemalloc = True
+    _profiler = profiler
+    return profiler
+
+
+def disable():
+    """Restore the original functions and return the finished profiler."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    for owner, name, raw in reversed(profiler.patched):
+        setattr(owner, name, raw)
+    if profiler.started_tracemalloc:
+        tracemalloc.stop()
+    return profiler
+
+
+@contextmanager
+def profile(memory=False, targets=TARGETS):
+    profiler = enable(memory=memory, targets=targets)
+    try:
+        yield profiler
+    finally:
+        disable()
+
+
+def span(name):
+    """A span around any block of code, a no-op while profiling is off."""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.span(name)
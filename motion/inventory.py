@@ -0,0 +1,327 @@
+"""Telemetry inventory, measures and subscriptions.
+
+Only the standard library is imported, so building or validating a
+subscription does not load NumPy, pandas or matplotlib.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+from pathlib import Path
+
+__all__ = [
+    "Measure",
+    "Measurable",
+    "Inventory",
+    "Subscription",
+    "column_name",
+    "column_names",
+]
+
+CACHE_DIR = Path(os.environ.get("MOTION_CACHE_DIR", ".telemetry_cache"))
+# bumped when the cached inventory data changes shape
+CACHE_VERSION = 1
+INVENTORY = Path(
+    os.environ.get(
+        "MOTION_INVENTORY", Path(__file__).with_name("swerve_inventory.json")
+    )
+)
+
+
+class Measure:
+    def __init__(self, id, description):
+        self.id = id
+        self.description = description
+
+    @classmethod
+    def from_json(cls, measure):
+        return Measure(id=measure["id"], description=measure["description"])
+
+    def __repr__(self):
+        return f"Measure(id={self.id!r},description={self.description!r})"
+
+    def __eq__(self, o: object):
+        return isinstance(o, Measure) and self.id == o.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+Measure.HC_VX = Measure(id="HC Vx", description="HC Vx")
+Measure.HC_VY = Measure(id="HC Vy", description="HC Vy")
+Measure.HC_OMEGA = Measure(id="HC Omega", description="HC Omega")
+Measure.TRAJECTORY_VELOCITY = Measure(id="Traj. Vel", description="Traj. Vel")
+Measure.TRAJECTORY_X = Measure(id="Traj. X", description="Traj. X")
+Measure.TRAJECTORY_Y = Measure(id="Traj. Y", description="Traj. Y")
+Measure.GYRO_ANGLE_DEGREE = Measure(
+    id="Gyro Angle (deg)", description="Gyro Angle (deg)"
+)
+Measure.ODOMETRY_X = Measure(id="Odometry X", description="Odometry X")
+Measure.ODOMETRY_Y = Measure(id="Odometry Y", description="Odometry Y")
+Measure.GYRO_ROTATION2D_DEGREE = Measure(
+    id="Gyro Rotation2d (deg)", description="Gyro Rotation2d (deg)"
+)
+Measure.OUTPUT_PERCENT = Measure(id="OUTPUT_PERCENT", description="Output Percentage")
+Measure.QUAD_B_PIN = Measure(id="QUAD_B_PIN", description="Quad B Pin State")
+Measure.QUAD_IDX_PIN = Measure(id="QUAD_IDX_PIN", description="Quad Index Pin State")
+Measure.QUAD_POSITION = Measure(id="QUAD_POSITION", description="Quad Position")
+Measure.QUAD_VELOCITY = Measure(id="QUAD_VELOCITY", description="Quad Velocity")
+Measure.PULSE_WIDTH_POSITION = Measure(
+    id="PULSE_WIDTH_POSITION", description="Pulse Width Position"
+)
+Measure.PULSE_WIDTH_VELOCITY = Measure(
+    id="PULSE_WIDTH_VELOCITY", description="Pulse Width Velocity"
+)
+Measure.PULSE_WIDTH_RISE_TO_FALL = Measure(
+    id="PULSE_WIDTH_RISE_TO_FALL", description="PWM Pulse Width"
+)
+Measure.PULSE_WIDTH_RISE_TO_RISE = Measure(
+    id="PULSE_WIDTH_RISE_TO_RISE", description="PWM Period"
+)
+Measure.FORWARD_LIMIT_SWITCH_CLOSED = Measure(
+    id="FORWARD_LIMIT_SWITCH_CLOSED", description="Forward Limit Switch Closed"
+)
+Measure.REVERSE_LIMIT_SWITCH_CLOSED = Measure(
+    id="REVERSE_LIMIT_SWITCH_CLOSED", description="Reverse Limit Switch Closed"
+)
+Measure.TEMPERATURE = Measure(id="TEMPERATURE", description="Controller Temperature")
+Measure.INTEGRATED_SENSOR_POSITION = Measure(
+    id="INTEGRATED_SENSOR_POSITION", description="Integrated Sensor Position"
+)
+Measure.INTEGRATED_SENSOR_ABSOLUTE_POSITION = Measure(
+    id="INTEGRATED_SENSOR_ABSOLUTE_POSITION",
+    description="Integrated Sensor Abs. Position",
+)
+Measure.INTEGRATED_SENSOR_VELOCITY = Measure(
+    id="INTEGRATED_SENSOR_VELOCITY", description="Integrated Sensor Velocity"
+)
+Measure.ACTIVE_TRAJECTORY_ARB_FEED_FWD = Measure(
+    id="ACTIVE_TRAJECTORY_ARB_FEED_FWD", description="Active Trajectory Arb. Feed FWD"
+)
+Measure.SELECTED_SENSOR_POSITION = Measure(
+    id="SELECTED_SENSOR_POSITION", description="Selected Sensor Position (PID 0)"
+)
+Measure.SELECTED_SENSOR_VELOCITY = Measure(
+    id="SELECTED_SENSOR_VELOCITY", description="Selected Sensor Velocity (PID 0)"
+)
+Measure.ACTIVE_TRAJECTORY_POSITION = Measure(
+    id="ACTIVE_TRAJECTORY_POSITION", description="Active Trajectory Position"
+)
+Measure.ACTIVE_TRAJECTORY_VELOCITY = Measure(
+    id="ACTIVE_TRAJECTORY_VELOCITY", description="Active Trajectory Velocity"
+)
+Measure.CLOSED_LOOP_ERROR = Measure(
+    id="CLOSED_LOOP_ERROR", description="Closed Loop Error (PID 0)"
+)
+Measure.BUS_VOLTAGE = Measure(id="BUS_VOLTAGE", description="Bus Voltage")
+Measure.ERROR_DERIVATIVE = Measure(
+    id="ERROR_DERIVATIVE", description="Error Derivative (PID 0)"
+)
+Measure.INTEGRAL_ACCUMULATOR = Measure(
+    id="INTEGRAL_ACCUMULATOR", description="Integral Accumulator (PID 0)"
+)
+Measure.ANALOG_IN = Measure(id="ANALOG_IN", description="Analog Position Input")
+Measure.ANALOG_IN_RAW = Measure(id="ANALOG_IN_RAW", description="Analog Raw Input")
+Measure.ODOMETRY_ROTATION2D_DEGREE = Measure(
+    id="Odometry Rotation2d (deg)", description="Odometry Rotation2d (deg)"
+)
+Measure.CLOSED_LOOP_TARGET = Measure(
+    id="CLOSED_LOOP_TARGET", description="Closed-loop Setpoint (PID 0)"
+)
+Measure.STATOR_CURRENT = Measure(id="STATOR_CURRENT", description="Stator Current")
+Measure.SUPPLY_CURRENT = Measure(id="SUPPLY_CURRENT", description="Supply Current")
+Measure.OUTPUT_VOLTAGE = Measure(id="OUTPUT_VOLTAGE", description="Output Voltage")
+Measure.TRAJECTORY_CURVATURE = Measure(
+    id="Traj. Curvature", description="Traj. Curvature"
+)
+Measure.TRAJECTORY_DEGREES = Measure(id="Traj. Degrees", description="Traj. Degrees")
+Measure.TRAJECTORY_TIME = Measure(id="Traj. Time", description="Traj. Time")
+Measure.TRAJECTORY_ACCELERATION = Measure(id="Traj. Accel", description="Traj. Accel")
+Measure.ANALOG_IN_VELOCITY = Measure(
+    id="ANALOG_IN_VELOCITY", description="Analog Velocity Input"
+)
+Measure.QUAD_A_PIN = Measure(id="QUAD_A_PIN", description="Quad A Pin State")
+
+
+def column_name(measurable_description, measure_description):
+    """Column name the telemetry CSV export uses for a measure."""
+    return re.sub(
+        r"[^0-9a-z]", "_", f"{measurable_description}__{measure_description}".lower()
+    )
+
+
+def column_names(measurable, measure):
+    """Every column name a CSV export has used for a measure, preferred first.
+
+    Older exports named Talon columns after the measure id rather than its
+    description, e.g. ``talonfx_10__selected_sensor_velocity``.
+    """
+    names = [column_name(measurable.description, measure.description)]
+    by_id = column_name(measurable.description, measure.id)
+    if by_id not in names:
+        names.append(by_id)
+    return names
+
+
+class Measurable:
+    def __init__(self, id, type, description, measures):
+        self.id = id
+        self.type = type
+        self.description = description
+        self.measures = measures
+        self._measures_by_id = {measure.id: measure for measure in measures}
+
+    @classmethod
+    def from_json(cls, measurable, measures):
+        return Measurable(
+            id=measurable["id"],
+            type=measurable["type"],
+            description=measurable["description"],
+            measures=[Measure.from_json(measure) for measure in measures],
+        )
+
+    def measure_by_id(self, id):
+        return self._measures_by_id.get(id)
+
+    def __repr__(self):
+        return f"Measurable(id={self.id!r},type={self.type!r},description={self.description!r},measures={self.measures!r})"
+
+
+# inventories loaded in this process, by resolved path
+_loaded = {}
+
+
+class Inventory:
+    """Measurables and their measures from a telemetry inventory, indexed."""
+
+    def __init__(self, inventory):
+        measures_by_type = {
+            device["deviceType"]: [
+                Measure.from_json(measure) for measure in device["deviceMeasures"]
+            ]
+            for device in inventory["measures"]
+        }
+        self.measurables = [
+            Measurable(
+                id=item["id"],
+                type=item["type"],
+                description=item["description"],
+                measures=measures_by_type.get(item["type"], []),
+            )
+            for item in inventory["items"]
+        ]
+        self.by_id = {measurable.id: measurable for measurable in self.measurables}
+        self.by_type = {}
+        for measurable in self.measurables:
+            self.by_type.setdefault(measurable.type, []).append(measurable)
+        self.measure_ids = {
+            (measurable.id, measure_id)
+            for measurable in self.measurables
+            for measure_id in measurable._measures_by_id
+        }
+
+    @classmethod
+    def load(cls, path=INVENTORY, cache=True, cache_dir=CACHE_DIR):
+        """The inventory at ``path``, reused while the file is unchanged.
+
+        The parsed JSON is cached in ``cache_dir`` under a key that includes
+        ``CACHE_VERSION``, so only plain data is ever unpickled.
+        """
+        path = Path(path)
+        if not cache:
+            with open(path) as f:
+                return cls(json.load(f))
+
+        stat = path.stat()
+        key = str(path.resolve())
+        loaded = _loaded.get(key)
+        if loaded is not None and loaded[:2] == (stat.st_size, stat.st_mtime_ns):
+            return loaded[2]
+
+        digest = hashlib.sha1(f"{CACHE_VERSION}:{key}".encode()).hexdigest()
+        cache_path = Path(cache_dir) / f"inventory-v{CACHE_VERSION}-{digest}.pickle"
+        data = None
+        try:
+            with open(cache_path, "rb") as f:
+                size, mtime_ns, cached = pickle.load(f)
+            if (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                data = cached
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            pass
+
+        if data is None:
+            with open(path) as f:
+                data = json.load(f)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(
+                    (stat.st_size, stat.st_mtime_ns, data), f, pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(tmp, cache_path)
+        inventory = cls(data)
+        _loaded[key] = (stat.st_size, stat.st_mtime_ns, inventory)
+        return inventory
+
+    def measurable_by_type(self, type):
+        measurables = self.by_type.get(type)
+        return measurables[0] if measurables else None
+
+    def measurable_by_id(self, id):
+        return self.by_id.get(id)
+
+    def invalid(self, subscription):
+        """Subscribed (itemId, measurementId) pairs missing from the inventory."""
+        requested = [(m["itemId"], m["measurementId"]) for m in subscription]
+        missing = set(requested) - self.measure_ids
+        return [pair for pair in requested if pair in missing]
+
+    def __repr__(self):
+        return f"Inventory(measurables={len(self.measurables)},measures={len(self.measure_ids)})"
+
+
+class Subscription:
+    def __init__(self, inventory=INVENTORY):
+        self.subscription = list()
+        if not isinstance(inventory, Inventory):
+            inventory = Inventory.load(inventory)
+        self.inventory = inventory
+        self.measurables = inventory.measurables
+
+    def measurable_by_type(self, type):
+        return self.inventory.measurable_by_type(type)
+
+    def measure_by_id(self, id):
+        return self.inventory.measurable_by_id(id)
+
+    def items(self):
+        """``(measurable, measure)`` for each subscribed measure, in order."""
+        for item in self.subscription:
+            measurable = self.measure_by_id(item["itemId"])
+            yield measurable, measurable.measure_by_id(item["measurementId"])
+
+    def columns(self):
+        """Log column names for each subscribed measure, in subscription order."""
+        return [
+            column_name(measurable.description, measure.description)
+            for measurable, measure in self.items()
+        ]
+
+    def append(self, measureableId, measureId):
+        self.subscription.append({"itemId": measureableId, "measurementId": measureId})
+
+    def validate(self):
+        invalid = self.inventory.invalid(self.subscription)
+        if invalid:
+            raise ValueError(f"measures not in inventory: {invalid!r}")
+
+    def to_json(self, indent=2):
+        sub_dict = {"type": "start", "subscription": self.subscription}
+        return json.dumps(sub_dict, indent=indent)
+
+    def __iter__(self):
+        return self.subscription.__iter__()
+
+    def __repr__(self):
+        return f"Subscription(type={self.type!r},subscription={self.subscription!r}"
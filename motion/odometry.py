@@ -0,0 +1,257 @@
+"""Swerve odometry replayed from logged drive velocities, on NumPy arrays.
+
+The logs hold each drive Talon's setpoint and sensor velocity but not its
+module angle. Modules are taken to point along their commanded velocity,
+the inverse kinematics of hc_vx, hc_vy and hc_omega turned into the robot
+frame by the gyro, flipped where the setpoint is negative as module state
+optimization does. A module keeps its last direction while its command is
+zero.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .path import error_stats
+
+# front left, front right, rear left, rear right, as in swerve.ipynb
+MODULE_LOCATIONS = ((0.3, 0.3), (0.3, -0.3), (-0.3, 0.3), (-0.3, -0.3))
+
+
+def module_locations(locations):
+    """Module ``x, y`` as an (n, 2) array, from Translation2d or pairs."""
+    return np.array(
+        [
+            (location.X(), location.Y()) if hasattr(location, "X") else tuple(location)
+            for location in locations
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+
+
+def inverse_kinematics(locations):
+    """The (2n, 3) matrix taking chassis vx, vy, omega to module vx, vy rows."""
+    locations = module_locations(locations)
+    matrix = np.zeros((2 * len(locations), 3))
+    matrix[0::2, 0] = 1.0
+    matrix[1::2, 1] = 1.0
+    matrix[0::2, 2] = -locations[:, 1]
+    matrix[1::2, 2] = locations[:, 0]
+    return matrix
+
+
+def _hold(values, valid):
+    """Each column of ``values`` holding its last ``valid`` entry, else zero."""
+    rows = np.where(valid, np.arange(len(values))[:, None], -1)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    held = values[np.maximum(rows, 0), np.arange(valid.shape[1])]
+    held[rows < 0] = 0.0
+    return held
+
+
+class OdometryReplay:
+    """Field odometry rebuilt from one run's wheel velocities and gyro.
+
+    Drive Talons are matched to ``locations`` in ascending Talon number.
+    Chassis speeds are the least squares forward kinematics of every
+    timestep at once, and poses integrate them in the field frame from the
+    logged odometry pose at the start of ``interval``. ``wheel_diameter_in``
+    rescales the wheel speeds converted at the telemetry's diameter.
+    """
+
+    def __init__(
+        self,
+        telemetry,
+        locations=MODULE_LOCATIONS,
+        wheel_diameter_in=None,
+        interval=None,
+    ):
+        self.telemetry = telemetry
+        self.locations = module_locations(locations)
+        self.nominal_diameter_in = telemetry.wheel_diameter_in
+        self.wheel_diameter_in = (
+            self.nominal_diameter_in if wheel_diameter_in is None else wheel_diameter_in
+        )
+        self.df = telemetry.df[telemetry.interval if interval is None else interval]
+
+        velocity = self.df.filter(regex=r"^t\d+_velocity$")
+        self.talons = sorted(int(name[1:].split("_")[0]) for name in velocity)
+        if not self.talons:
+            raise ValueError(f"{telemetry.name} has no drive velocity columns")
+        if len(self.talons) != len(self.locations):
+            raise ValueError(
+                f"{len(self.talons)} drive Talons for {len(self.locations)} module locations"
+            )
+
+    @property
+    def scale(self):
+        return self.wheel_diameter_in / self.nominal_diameter_in
+
+    def _columns(self, suffix):
+        return self.df[[f"t{n}_{suffix}" for n in self.talons]].to_numpy(np.float64)
+
+    @cached_property
+    def heading(self):
+        """Gyro heading in radians."""
+        return np.radians(self.df["gyro_deg"].to_numpy(np.float64))
+
+    @cached_property
+    def directions(self):
+        """Unit module directions in the robot frame, shape (samples, modules, 2)."""
+        cos, sin = np.cos(self.heading), np.sin(self.heading)
+        vx = self.df["hc_vx"].to_numpy(np.float64)
+        vy = self.df["hc_vy"].to_numpy(np.float64)
+        command = np.column_stack(
+            [cos * vx + sin * vy, cos * vy - sin * vx, self.df["hc_omega"].to_numpy()]
+        )
+        modules = (command @ inverse_kinematics(self.locations).T).reshape(
+            len(command), -1, 2
+        )
+        norm = np.hypot(modules[..., 0], modules[..., 1])
+        np.divide(modules, norm[..., None], out=modules, where=norm[..., None] > 0)
+        return _hold(modules, norm > 0)
+
+    @cached_property
+    def wheel_speeds(self):
+        """Signed wheel speeds in m/s at the telemetry's wheel diameter."""
+        setpoint = np.sign(self._columns("setpoint"))
+        sign = _hold(setpoint, setpoint != 0)
+        sign[sign == 0] = 1.0
+        return self.telemetry._drive_mps(self._columns("velocity")) * sign
+
+    @cached_property
+    def _chassis(self):
+        modules = self.wheel_speeds[..., None] * self.directions
+        return (
+            modules.reshape(len(modules), -1)
+            @ np.linalg.pinv(inverse_kinematics(self.locations)).T
+        )
+
+    @cached_property
+    def _displacement(self):
+        """Field displacement from the first sample at the telemetry's diameter."""
+        vx, vy = self._chassis[:, 0], self._chassis[:, 1]
+        cos, sin = np.cos(self.heading), np.sin(self.heading)
+        dt = np.diff(self.df["timestamp"].to_numpy()) / 1000.0
+        displacement = np.zeros((len(dt) + 1, 2))
+        np.cumsum((cos * vx - sin * vy)[:-1] * dt, out=displacement[1:, 0])
+        np.cumsum((sin * vx + cos * vy)[:-1] * dt, out=displacement[1:, 1])
+        return displacement
+
+    @cached_property
+    def _odometry(self):
+        return self.df[["odom_x", "odom_y"]].to_numpy(np.float64)
+
+    @cached_property
+    def chassis_speeds(self):
+        """Robot frame vx, vy and omega from forward kinematics."""
+        return pd.DataFrame(
+            self._chassis * self.scale,
+            columns=["vx", "vy", "omega"],
+            index=self.df.index,
+        )
+
+    @cached_property
+    def poses(self):
+        xy = self._odometry[0] + self._displacement * self.scale
+        return pd.DataFrame(
+            {"x": xy[:, 0], "y": xy[:, 1], "deg": self.df["gyro_deg"].to_numpy()},
+            index=self.df.index,
+        )
+
+    @cached_property
+    def drift(self):
+        """Replayed less on-robot odometry position, and the distance between."""
+        dx = self.poses["x"].to_numpy() - self._odometry[:, 0]
+        dy = self.poses["y"].to_numpy() - self._odometry[:, 1]
+        return pd.DataFrame(
+            {"dx": dx, "dy": dy, "distance": np.hypot(dx, dy)}, index=self.df.index
+        )
+
+    def drift_summary(self):
+        """RMS, p95, max and final drift distance."""
+        distance = self.drift["distance"].to_numpy()
+        return {**error_stats(distance), "final": distance[-1]}
+
+    def plot(self, ax=None):
+        if ax is None:
+            from matplotlib import pyplot
+
+            _, ax = pyplot.subplots()
+        ax.plot(self._odometry[:, 0], self._odometry[:, 1], label="odometry")
+        ax.plot(self.poses["x"], self.poses["y"], label="replay")
+        ax.legend()
+        ax.grid()
+        ax.set_ylabel("meters")
+        ax.set_xlabel("meters")
+        return ax
+
+    def __repr__(self):
+        return (
+            f"OdometryReplay({self.telemetry.name!r},modules={len(self.talons)},"
+            f"wheel_diameter_in={self.wheel_diameter_in:.4f})"
+        )
+
+
+class WheelCalibration:
+    """The wheel diameter that best fits replayed to on-robot odometry.
+
+    Replayed displacement is proportional to the wheel diameter, so each
+    run reduces to three sums over its samples and the squared drift of
+    any diameter is a quadratic in it. ``rms_drift`` is then a few
+    arithmetic operations per diameter, cheap enough for an optimizer, and
+    ``wheel_diameter_in`` is the closed form least squares fit.
+    """
+
+    def __init__(self, replays):
+        self.replays = list(replays)
+        if not self.replays:
+            raise ValueError("no runs to calibrate")
+        names, sums = [], []
+        for replay in self.replays:
+            # displacement per inch of wheel diameter, against odometry's
+            p = replay._displacement / replay.nominal_diameter_in
+            o = replay._odometry - replay._odometry[0]
+            names.append(replay.telemetry.name)
+            sums.append((np.sum(p * p), np.sum(p * o), np.sum(o * o), len(p)))
+        self.names = names
+        self.pp, self.po, self.oo, self.samples = np.array(sums).T
+
+    @classmethod
+    def from_corpus(cls, telemetries, **kwargs):
+        """Calibrate over every run with drive velocities."""
+        replays = []
+        for t in telemetries:
+            try:
+                replays.append(OdometryReplay(t, **kwargs))
+            except (ValueError, KeyError, IndexError):
+                continue
+        return cls(replays)
+
+    @cached_property
+    def wheel_diameter_in(self):
+        return self.po.sum() / self.pp.sum()
+
+    def _squared(self, wheel_diameter_in):
+        d = np.asarray(wheel_diameter_in, dtype=np.float64)[..., None]
+        return np.maximum(d * d * self.pp - 2.0 * d * self.po + self.oo, 0.0)
+
+    def rms_drift(self, wheel_diameter_in):
+        """RMS drift over every sample of every run, for one or many diameters."""
+        return np.sqrt(self._squared(wheel_diameter_in).sum(-1) / self.samples.sum())
+
+    def run_drift(self, wheel_diameter_in=None):
+        """RMS drift of each run at ``wheel_diameter_in``, the fit by default."""
+        if wheel_diameter_in is None:
+            wheel_diameter_in = self.wheel_diameter_in
+        rms = np.sqrt(self._squared(wheel_diameter_in) / self.samples)
+        return pd.Series(rms, index=self.names, name="rms_drift")
+
+    def __len__(self):
+        return len(self.replays)
+
+    def __repr__(self):
+        return (
+            f"WheelCalibration(runs={len(self)},"
+            f"wheel_diameter_in={self.wheel_diameter_in:.4f})"
+        )
@@ -0,0 +1,225 @@
+"""Nearest-point queries against a reference path polyline, on NumPy arrays."""
+from collections import namedtuple
+from functools import cached_property
+
+import numpy as np
+
+Projection = namedtuple(
+    "Projection", ["segment", "fraction", "x", "y", "station", "offset"]
+)
+
+# point-segment pairs compared at once when scanning every segment
+SCAN_CHUNK = 1 << 20
+
+
+def wrap_degrees(degrees):
+    return (np.asarray(degrees) + 180.0) % 360.0 - 180.0
+
+
+def error_stats(values):
+    """RMS, 95th percentile and maximum of absolute errors, ignoring NaN."""
+    values = np.abs(np.asarray(values, dtype=np.float64))
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"rms": np.nan, "p95": np.nan, "max": np.nan}
+    return {
+        "rms": np.sqrt(np.mean(values ** 2)),
+        "p95": np.percentile(values, 95),
+        "max": values.max(),
+    }
+
+
+def _distance(x, y, sx, sy, dx, dy, length2):
+    """Squared distance to, and fraction along, segments from ``(sx, sy)``."""
+    ox = x - sx
+    oy = y - sy
+    fraction = np.divide(
+        ox * dx + oy * dy, length2, out=np.zeros(np.shape(ox)), where=length2 > 0
+    )
+    np.clip(fraction, 0.0, 1.0, out=fraction)
+    ox -= fraction * dx
+    oy -= fraction * dy
+    return ox * ox + oy * oy, fraction
+
+
+class PathIndex:
+    """A polyline with its segments filed in a uniform grid.
+
+    Cells default to the 90th percentile segment length. Each cell lists
+    the segments whose bounding boxes touch it or its eight neighbours, so
+    the nearest segment to a point within one cell of the path is in the
+    list of the point's cell. Points further out are looked up again in a
+    grid of cells four times as wide, and past the extent of the path
+    against every segment.
+
+    Repeated points are dropped from the polyline; ``vertex`` maps each
+    input point to its polyline vertex and ``stations`` holds the arc length
+    at each vertex.
+    """
+
+    def __init__(self, x, y, cell=None):
+        points = np.column_stack(
+            [np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)]
+        )
+        if not len(points):
+            raise ValueError("path has no points")
+        moved = np.ones(len(points), dtype=bool)
+        moved[1:] = np.any(points[1:] != points[:-1], axis=1)
+        self.first = np.flatnonzero(moved)
+        self.vertex = np.cumsum(moved) - 1
+        self.points = points[moved]
+        if len(self.points) == 1:
+            # a single degenerate segment keeps the arithmetic below uniform
+            self.first = np.repeat(self.first, 2)
+            self.points = np.repeat(self.points, 2, axis=0)
+
+        self.start = self.points[:-1]
+        self.delta = self.points[1:] - self.start
+        self.length = np.hypot(self.delta[:, 0], self.delta[:, 1])
+        self.stations = np.concatenate(([0.0], np.cumsum(self.length)))
+
+        self.origin = self.points.min(axis=0)
+        span = np.ptp(self.points, axis=0)
+        self.extent = span.max()
+        if cell is None:
+            cell = np.percentile(self.length, 90)
+        self.cell = cell if cell > 0 else 1.0
+        # a margin of one cell on each side holds the neighbours of edge cells
+        self.shape = np.floor(span / self.cell).astype(np.int64) + 3
+        self._build()
+
+    def _cells(self, points):
+        return np.floor((points - self.origin) / self.cell).astype(np.int64) + 1
+
+    def _build(self):
+        lo = self._cells(np.minimum(self.start, self.points[1:])) - 1
+        hi = self._cells(np.maximum(self.start, self.points[1:])) + 1
+        # every cell in the 3x3 blocks around the cells a segment's box covers
+        rows, cols = (hi - lo + 1).T
+        segments = np.repeat(np.arange(len(self)), rows * cols)
+        first = np.repeat(np.cumsum(rows * cols) - rows * cols, rows * cols)
+        offset = np.arange(len(segments)) - first
+        i = lo[segments, 0] + offset // cols[segments]
+        j = lo[segments, 1] + offset % cols[segments]
+        keys = i * self.shape[1] + j
+        order = np.argsort(keys, kind="stable")
+        segments = segments[order]
+
+        self._keys, starts, counts = np.unique(
+            keys[order], return_index=True, return_counts=True
+        )
+        # cells with no segments look up the empty list past the end
+        self._starts = np.append(starts, 0)
+        self._counts = np.append(counts, 0)
+        self._segments = segments
+        # segment data copied out in list order, so a cell's list is contiguous
+        self._columns = (
+            self.start[segments, 0],
+            self.start[segments, 1],
+            self.delta[segments, 0],
+            self.delta[segments, 1],
+            self.length[segments] ** 2,
+        )
+
+    def _in_window(self, segments, near, horizon):
+        return (self.stations[segments + 1] >= near - horizon) & (
+            self.stations[segments] <= near + horizon
+        )
+
+    @cached_property
+    def coarse(self):
+        """The same path in cells four times as wide, or None past its extent."""
+        if self.cell >= self.extent:
+            return None
+        return PathIndex(self.points[:, 0], self.points[:, 1], cell=self.cell * 4)
+
+    def _nearest(self, x, y, near, horizon):
+        cells = self._cells(np.column_stack([x, y]))
+        np.clip(cells, 0, self.shape - 1, out=cells)
+        key = cells[:, 0] * self.shape[1] + cells[:, 1]
+        found = np.searchsorted(self._keys, key)
+        found[self._keys[np.minimum(found, len(self._keys) - 1)] != key] = len(
+            self._keys
+        )
+        counts = self._counts[found]
+        starts = np.cumsum(counts) - counts
+        entries = np.repeat(self._starts[found] - starts, counts)
+        entries += np.arange(len(entries))
+        d2, fraction = _distance(
+            np.repeat(x, counts),
+            np.repeat(y, counts),
+            *(column[entries] for column in self._columns),
+        )
+        if horizon is not None:
+            window = self._in_window(
+                self._segments[entries], np.repeat(near, counts), horizon
+            )
+            d2[~window] = np.inf
+
+        n = len(x)
+        best = np.full(n, np.inf)
+        has = counts > 0
+        if len(d2):
+            best[has] = np.minimum.reduceat(d2, starts[has])
+        # scatter in reverse so the first entry at the minimum wins
+        matches = np.flatnonzero(d2 == np.repeat(best, counts))[::-1]
+        chosen = np.zeros(n, dtype=np.int64)
+        chosen[np.repeat(np.arange(n), counts)[matches]] = matches
+        segment = np.zeros(n, dtype=np.int64)
+        segment[has] = self._segments[entries[chosen[has]]]
+        fraction = np.where(has, fraction[chosen] if len(d2) else 0.0, 0.0)
+
+        # further than a cell from every listed segment, so not necessarily nearest
+        far = np.flatnonzero(~(best <= self.cell ** 2))
+        if len(far):
+            lookup = self._scan if self.coarse is None else self.coarse._nearest
+            segment[far], fraction[far], best[far] = lookup(
+                x[far], y[far], None if near is None else near[far], horizon
+            )
+        return segment, fraction, best
+
+    def _scan(self, x, y, near, horizon):
+        """Nearest segments by comparing every point against every segment."""
+        segment = np.zeros(len(x), dtype=np.int64)
+        fraction, best = np.zeros(len(x)), np.zeros(len(x))
+        every = np.arange(len(self))
+        columns = (*self.start.T, *self.delta.T, self.length ** 2)
+        step = max(1, SCAN_CHUNK // len(self))
+        for i in range(0, len(x), step):
+            rows = slice(i, i + step)
+            d2, t = _distance(x[rows, None], y[rows, None], *columns)
+            if horizon is not None:
+                d2[~self._in_window(every, near[rows, None], horizon)] = np.inf
+            nearest = np.argmin(d2, axis=1)
+            picked = np.arange(len(nearest)), nearest
+            segment[rows], fraction[rows], best[rows] = nearest, t[picked], d2[picked]
+        return segment, fraction, best
+
+    def project(self, x, y, near=None, horizon=None):
+        """The nearest point of the path to each ``(x, y)``.
+
+        With ``horizon``, each point only matches segments within ``horizon``
+        of its ``near`` station, which keeps a point on a path that crosses
+        itself matched to the pass it is following.
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if horizon is None:
+            near = None
+        else:
+            near = np.broadcast_to(np.asarray(near, dtype=np.float64), x.shape)
+        segment, fraction, _ = self._nearest(x, y, near, horizon)
+
+        (sx, sy), (dx, dy) = self.start[segment].T, self.delta[segment].T
+        px = sx + fraction * dx
+        py = sy + fraction * dy
+        cross = dx * (y - py) - dy * (x - px)
+        offset = np.copysign(np.hypot(x - px, y - py), cross)
+        station = self.stations[segment] + fraction * self.length[segment]
+        return Projection(segment, fraction, px, py, station, offset)
+
+    def __len__(self):
+        return len(self.length)
+
+    def __repr__(self):
+        return f"PathIndex(segments={len(self)},length={self.stations[-1]:.3f},cell={self.cell:.3f})"
@@ -0,0 +1,252 @@
+"""Plotting helpers and pixel-width decimation for long series."""
+import matplotlib.patches as patches
+import matplotlib.pyplot as plt
+import numpy as np
+from more_itertools import pairwise
+
+from .sim import QuinticSplines, state_array
+
+
+def minmax_indices(ys, buckets):
+    """Sample positions keeping the first, last, min and max of every bucket.
+
+    The samples are split into ``buckets`` runs of equal length and each of
+    ``ys`` contributes its extremes in every run, so peaks survive however
+    long the log is. NaNs never win a bucket.
+    """
+    n = len(ys[0]) if len(ys) else 0
+    if n <= 4 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    count = -(-n // size)
+    pad = count * size - n
+    base = np.arange(count) * size
+    keep = [base, np.minimum(base + size - 1, n - 1)]
+    for y in ys:
+        y = np.asarray(y, dtype=float)
+        nan = np.isnan(y)
+        low = np.pad(np.where(nan, np.inf, y), (0, pad), constant_values=np.inf)
+        high = np.pad(np.where(nan, -np.inf, y), (0, pad), constant_values=-np.inf)
+        keep.append(base + low.reshape(count, size).argmin(axis=1))
+        keep.append(base + high.reshape(count, size).argmax(axis=1))
+    return np.unique(np.minimum(np.concatenate(keep), n - 1))
+
+
+class Decimation:
+    """Lines and fills over one sample axis, decimated to the axes' pixels.
+
+    Artists are drawn from the min/max of each pixel column of the visible
+    samples and redrawn from the full data whenever the view limits change,
+    so draw cost follows the axes width rather than the log length. With
+    ``xy=True`` the lines are paths such as x against y, and visibility is
+    decided on both axes.
+    """
+
+    def __init__(self, ax, x, xy=False, enabled=True):
+        self.ax = ax
+        self.x = np.asarray(x)
+        self.xy = xy
+        self.enabled = enabled
+        self.lines = []
+        self.fills = []
+        if not enabled:
+            return
+        # the callback registry only holds bound methods weakly, the closure
+        # keeps this object alive as long as the axes
+        ax.callbacks.connect("xlim_changed", lambda ax: self.update())
+        if xy:
+            ax.callbacks.connect("ylim_changed", lambda ax: self.update())
+
+    def plot(self, y, x=None, **kwargs):
+        x = self.x if x is None else np.asarray(x)
+        y = np.asarray(y)
+        (line,) = self.ax.plot(x, y, **kwargs)
+        self.lines.append((line, x, y))
+        return line
+
+    def fill_between(self, y1, y2, **kwargs):
+        y1, y2 = np.asarray(y1), np.asarray(y2)
+        poly = self.ax.fill_between(self.x, y1, y2, **kwargs)
+        self.fills.append((poly, y1, y2))
+        return poly
+
+    def visible(self):
+        if not self.xy:
+            lo, hi = sorted(self.ax.get_xlim())
+            start = max(self.x.searchsorted(lo) - 1, 0)
+            stop = min(self.x.searchsorted(hi, side="right") + 1, len(self.x))
+            return np.arange(start, stop)
+        (x0, x1), (y0, y1) = map(sorted, (self.ax.get_xlim(), self.ax.get_ylim()))
+        inside = np.zeros(len(self.x), dtype=bool)
+        for _, x, y in self.lines:
+            inside |= (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        # neighbours of visible samples keep segments crossing the edge
+        inside[:-1] |= inside[1:]
+        inside[1:] |= inside[:-1]
+        return np.flatnonzero(inside)
+
+    def update(self):
+        if not self.enabled:
+            return
+        visible = self.visible()
+        ys = [y for _, x, y in self.lines]
+        if self.xy:
+            ys += [x for _, x, y in self.lines]
+        ys += [y for _, y1, y2 in self.fills for y in (y1, y2)]
+        buckets = max(1, int(self.ax.bbox.width))
+        i = visible[minmax_indices([y[visible] for y in ys], buckets)]
+        for line, x, y in self.lines:
+            line.set_data(x[i], y[i])
+        for poly, y1, y2 in self.fills:
+            poly.set_verts([fill_verts(self.x[i], y1[i], y2[i])])
+
+
+def fill_verts(x, y1, y2):
+    """Polygon vertices of the area between ``y1`` and ``y2``, for ``set_verts``."""
+    return np.concatenate(
+        (np.column_stack((x, y1)), np.column_stack((x[::-1], y2[::-1])))
+    )
+
+
+def plot_swerve(wheel_locs, module_states):
+    wheel_locs = state_array(wheel_locs)
+    module_states = state_array(module_states)
+    wheel_locs_x = wheel_locs["x"]
+    wheel_locs_y = wheel_locs["y"]
+
+    wheel_vecs_x = module_states["velocity"] * np.cos(module_states["heading"])
+    wheel_vecs_y = module_states["velocity"] * np.sin(module_states["heading"])
+
+    fig, ax = plt.subplots()
+    rect = patches.Rectangle(
+        (wheel_locs_x[3], wheel_locs_y[3]),
+        wheel_locs_x[0] - wheel_locs_x[3],
+        wheel_locs_y[0] - wheel_locs_y[3],
+        linewidth=1,
+        edgecolor="r",
+        facecolor="none",
+    )
+    ax.add_patch(rect)
+
+    plt.quiver(
+        wheel_locs_x,
+        wheel_locs_y,
+        wheel_vecs_x,
+        wheel_vecs_y,
+        angles="xy",
+        scale_units="xy",
+        scale=2,
+        width=0.0125,
+    )
+
+    plt.xlim(-1, 1)
+    plt.ylim(-1, 1)
+    offset = -0.12
+    plt.text(wheel_locs_x[0] + offset, wheel_locs_y[0] + offset, "FL")
+    plt.text(wheel_locs_x[1] + offset, wheel_locs_y[1] + offset, "FR")
+    plt.text(wheel_locs_x[2] + offset, wheel_locs_y[2] + offset, "RL")
+    plt.text(wheel_locs_x[3] + offset, wheel_locs_y[3] + offset, "RR")
+    ax.set_aspect("equal", "box")
+    plt.savefig("swerve.svg")
+    plt.show()
+
+
+def plot_trajectories(
+    holonomic_speeds, odometry_poses, trajectory_states, Kp, arrows=False
+):
+    odometry_poses = state_array(odometry_poses)
+    trajectory_states = state_array(trajectory_states)
+
+    fig, ax = plt.subplots()
+    ax.scatter(odometry_poses["x"], odometry_poses["y"], label="odometry")
+    ax.scatter(
+        trajectory_states["x"],
+        trajectory_states["y"],
+        label="trajectory",
+        alpha=0.5,
+    )
+
+    if arrows:
+        sampled_odometry_poses = odometry_poses[::8]
+        sampled_holonomic_speeds = state_array(holonomic_speeds)[::8]
+        speed = sampled_holonomic_speeds["velocity"]
+        heading = sampled_holonomic_speeds["heading"]
+        ax.quiver(
+            sampled_odometry_poses["x"],
+            sampled_odometry_poses["y"],
+            speed * np.cos(heading),
+            speed * np.sin(heading),
+            angles="xy",
+            scale_units="xy",
+            scale=2,
+            color="r"
+            # width=0.0125,
+        )
+
+    ax.legend()
+    ax.set_title(f"HolonomicDriveController Kp={Kp}")
+    ax.set_xlabel("Field X (meters)")
+    ax.set_ylabel("Field Y (meters)")
+    ax.set_aspect("equal", "box")
+    plt.savefig(f"Kp={Kp}.svg")
+    plt.show()
+
+
+def plot_splines(
+    ax=None,
+    waypoints=None,
+    xlim=None,
+    ylim=None,
+    show_vectors=True,
+    samples=50,
+):
+    from wpimath.spline import QuinticHermiteSpline
+
+    if ax is None:
+        _, ax = plt.subplots()
+
+    ax.set_aspect("equal", "box")
+
+    if not xlim is None:
+        ax.set_xlim(*xlim)
+    if not ylim is None:
+        ax.set_ylim(*ylim)
+
+    if show_vectors:
+        ax.quiver(
+            [wp[0][0] for wp in waypoints],
+            [wp[0][1] for wp in waypoints],
+            [wp[1][0] for wp in waypoints],
+            [wp[1][1] for wp in waypoints],
+            angles="xy",
+            scale_units="xy",
+            scale=2,
+        )
+
+    colors = ["b", "g", "r"]
+
+    splines = []
+    curve = QuinticSplines(waypoints).sample(samples)
+
+    for i, (wp_start, wp_end) in enumerate(pairwise(waypoints)):
+        x_init_control_vec = (wp_start[0][0], wp_start[1][0], 0)
+        x_fin_control_vec = (wp_end[0][0], wp_end[1][0], 0)
+        y_init_control_vec = (wp_start[0][1], wp_start[1][1], 0)
+        y_fin_control_vec = (wp_end[0][1], wp_end[1][1], 0)
+
+        spline = QuinticHermiteSpline(
+            x_init_control_vec, x_fin_control_vec, y_init_control_vec, y_fin_control_vec
+        )
+
+        splines.append(spline)
+
+        segment = slice(i * samples, (i + 1) * samples + 1)
+        ax.plot(
+            curve["x"][segment],
+            curve["y"][segment],
+            color=colors[i % 3],
+            label=f"spline {i+1}",
+        )
+
+    ax.legend()
+    return ax, splines
@@ -0,0 +1,345 @@
+"""Path-following simulation and spline math on NumPy arrays.
+
+wpimath is imported on first use, inside the functions that build or read
+wpimath objects.
+"""
+import functools
+import math
+import weakref
+
+import numpy as np
+
+
+# rows are the t^5 .. t^0 coefficients of a quintic Hermite segment in terms
+# of (p0, p0', p0'', p1, p1', p1''), as in wpimath QuinticHermiteSpline
+QUINTIC_HERMITE_BASIS = np.array(
+    [
+        [-6.0, -3.0, -0.5, 6.0, -3.0, 0.5],
+        [15.0, 8.0, 1.5, -15.0, 7.0, -1.0],
+        [-10.0, -6.0, -1.5, 10.0, -4.0, 0.5],
+        [0.0, 0.0, 0.5, 0.0, 0.0, 0.0],
+        [0.0, 1.0, 0.0, 0.0, 0.0, 0.0],
+        [1.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    ]
+)
+
+# SplineParameterizer tolerances
+MAX_DX = 0.127
+MAX_DY = 0.00127
+MAX_DTHETA = 0.0872
+MAX_ITERATIONS = 5000
+
+
+class QuinticSplines:
+    """Quintic Hermite splines through ``(position, tangent)`` waypoints.
+
+    Equivalent to the ``QuinticHermiteSpline`` per waypoint pair built by
+    ``plot_splines``, with all segments evaluated together as NumPy arrays.
+    Sample parameters run from 0 to the number of segments, the integer
+    part selecting the segment.
+    """
+
+    def __init__(self, waypoints, accelerations=None):
+        waypoints = np.asarray(waypoints, dtype=float)
+        if accelerations is None:
+            accelerations = np.zeros((len(waypoints), 2))
+        controls = np.concatenate(
+            [waypoints, np.asarray(accelerations, dtype=float)[:, None, :]], axis=1
+        )
+        # (segments, 6, 2): control vectors of both ends of every segment
+        ends = np.concatenate([controls[:-1], controls[1:]], axis=1)
+        self.coefficients = np.einsum("ij,sjk->sik", QUINTIC_HERMITE_BASIS, ends)
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def _locate(self, t):
+        t = np.asarray(t, dtype=float)
+        segment = np.clip(np.floor(t).astype(int), 0, len(self) - 1)
+        return segment, t - segment
+
+    def evaluate(self, t):
+        """Position, heading and curvature at spline parameters ``t``."""
+        segment, u = self._locate(t)
+        c = self.coefficients[segment]
+        powers = u[..., None] ** np.arange(5, -1, -1)
+        dc = c[..., :5, :] * np.arange(5, 0, -1)[:, None]
+        ddc = dc[..., :4, :] * np.arange(4, 0, -1)[:, None]
+        p = np.einsum("...i,...ik->...k", powers, c)
+        dp = np.einsum("...i,...ik->...k", powers[..., 1:], dc)
+        ddp = np.einsum("...i,...ik->...k", powers[..., 2:], ddc)
+        dx, dy = dp[..., 0], dp[..., 1]
+        ddx, ddy = ddp[..., 0], ddp[..., 1]
+        return {
+            "t": np.asarray(t, dtype=float),
+            "x": p[..., 0],
+            "y": p[..., 1],
+            "heading": np.arctan2(dy, dx),
+            "curvature": (dx * ddy - ddx * dy) / np.hypot(dx, dy) ** 3,
+            "speed": np.hypot(dx, dy),
+        }
+
+    def sample(self, samples=50):
+        """``samples`` evenly spaced parameters per segment, ends included."""
+        u = np.linspace(0.0, 1.0, samples + 1)[:-1]
+        t = (np.arange(len(self))[:, None] + u).ravel()
+        return self.evaluate(np.append(t, len(self)))
+
+    def sample_arc_length(self, ds, resolution=1000):
+        """Points spaced ``ds`` apart along the curve, plus the end point."""
+        dense = self.sample(resolution)
+        length = np.concatenate(
+            [[0.0], np.cumsum(np.hypot(np.diff(dense["x"]), np.diff(dense["y"])))]
+        )
+        s = np.append(np.arange(0.0, length[-1], ds), length[-1])
+        points = self.evaluate(np.interp(s, length, dense["t"]))
+        points["s"] = s
+        return points
+
+    def sample_adaptive(self, max_dx=MAX_DX, max_dy=MAX_DY, max_dtheta=MAX_DTHETA):
+        """Bisect segments until each arc is within tolerance.
+
+        Uses the ``SplineParameterizer`` criteria, the dx, dy and dtheta of
+        the twist between consecutive poses, bisecting every failing arc of
+        every segment in the same pass.
+        """
+        t0 = np.arange(len(self), dtype=float)
+        t1 = t0 + 1.0
+        accepted = []
+        for _ in range(MAX_ITERATIONS):
+            if len(t0) == 0:
+                break
+            start, end = self.evaluate(t0), self.evaluate(t1)
+            dtheta = np.angle(np.exp(1j * (end["heading"] - start["heading"])))
+            chord = (end["x"] - start["x"]) + 1j * (end["y"] - start["y"])
+            chord *= np.exp(-1j * start["heading"])
+            half = dtheta / 2
+            cos_minus_one = np.cos(dtheta) - 1
+            small = np.abs(cos_minus_one) < 1e-9
+            scale = np.where(
+                small,
+                1.0 - dtheta ** 2 / 12.0,
+                -half * np.sin(dtheta) / np.where(small, 1.0, cos_minus_one),
+            )
+            twist = chord * (scale - 1j * half)
+            ok = (
+                (np.abs(twist.real) <= max_dx)
+                & (np.abs(twist.imag) <= max_dy)
+                & (np.abs(dtheta) <= max_dtheta)
+            )
+            accepted.append(t1[ok])
+            mid = (t0[~ok] + t1[~ok]) / 2
+            t0 = np.concatenate([t0[~ok], mid])
+            t1 = np.concatenate([mid, t1[~ok]])
+        else:
+            raise RuntimeError("spline could not be parameterized within tolerance")
+        t = np.sort(np.concatenate([[0.0], *accepted]))
+        return self.evaluate(t)
+
+
+class HolonomicDriveController:
+    def __init__(self, pid_x, pid_y):
+        from wpimath.geometry import Translation2d
+
+        self.pid_x = pid_x
+        self.pid_y = pid_y
+        self.max_translation_error = 0
+        self.max_translation_error_max_pos = Translation2d()
+        self.x_fb_max = 0
+        self.y_fb_max = 0
+
+    def calculate(self, current_pose, desired_state):
+        from wpimath.kinematics import ChassisSpeeds
+
+        pose_ref = desired_state.pose
+        velocity_ref = desired_state.velocity
+
+        x_ff = velocity_ref * pose_ref.rotation().cos()
+        y_ff = velocity_ref * pose_ref.rotation().sin()
+        theta_ff = 0
+
+        self.pid_x.setpoint = pose_ref.X()
+        self.pid_y.setpoint = pose_ref.Y()
+        x_fb = self.pid_x(current_pose.X())
+        y_fb = self.pid_y(current_pose.Y())
+
+        # log max error and feedback correction
+        translation_error = pose_ref.translation().distance(current_pose.translation())
+        if translation_error > self.max_translation_error:
+            self.max_translation_error = translation_error
+            self.translation_error_max_pos = current_pose.translation()
+
+        if abs(x_fb) > abs(self.x_fb_max):
+            self.x_fb_max = x_fb
+
+        if abs(y_fb) > abs(self.y_fb_max):
+            self.y_fb_max = y_fb
+
+        return ChassisSpeeds(x_ff + x_fb, y_ff + y_fb, theta_ff)
+
+
+STATE_FIELDS = ("t", "x", "y", "heading", "velocity", "acceleration", "curvature")
+STATE_DTYPE = np.dtype([(name, np.float64) for name in STATE_FIELDS])
+
+NAN = math.nan
+
+
+@functools.lru_cache(maxsize=None)
+def _state_fields():
+    """Element type to its STATE_DTYPE tuple, built when wpimath is first needed."""
+    from wpimath.geometry import Pose2d, Translation2d
+    from wpimath.kinematics import ChassisSpeeds, SwerveModuleState
+    from wpimath.trajectory import Trajectory
+
+    # one tuple in STATE_DTYPE order per element, fields the element lacks are NaN
+    return {
+        Trajectory.State: lambda s: (
+            s.t,
+            s.pose.X(),
+            s.pose.Y(),
+            s.pose.rotation().radians(),
+            s.velocity,
+            s.acceleration,
+            s.curvature,
+        ),
+        Pose2d: lambda p: (NAN, p.X(), p.Y(), p.rotation().radians(), NAN, NAN, NAN),
+        Translation2d: lambda p: (NAN, p.X(), p.Y(), NAN, NAN, NAN, NAN),
+        SwerveModuleState: lambda s: (
+            NAN,
+            NAN,
+            NAN,
+            s.angle.radians(),
+            s.speed,
+            NAN,
+            NAN,
+        ),
+        ChassisSpeeds: lambda s: (
+            NAN,
+            NAN,
+            NAN,
+            math.atan2(s.vy, s.vx),
+            math.hypot(s.vx, s.vy),
+            NAN,
+            NAN,
+        ),
+    }
+
+
+_trajectory_arrays = {}
+
+
+def state_array(states):
+    """A structured STATE_DTYPE array of trajectory states, poses or speeds.
+
+    Accepts a ``Trajectory``, a sequence of ``Trajectory.State``, ``Pose2d``,
+    ``Translation2d``, ``SwerveModuleState`` or ``ChassisSpeeds``, a dict of
+    field arrays, or an array that is already converted, which is returned
+    as is. Module states and chassis speeds fill ``heading`` and
+    ``velocity`` with their direction and speed.
+
+    The array of a ``Trajectory`` is built once per object and shared
+    read-only.
+    """
+    if isinstance(states, np.ndarray) and states.dtype == STATE_DTYPE:
+        return states
+    if isinstance(states, dict):
+        n = len(next(iter(states.values())))
+        array = np.full(n, NAN, dtype=STATE_DTYPE)
+        for name, values in states.items():
+            array[name] = values
+        return array
+    from wpimath.trajectory import Trajectory
+
+    if isinstance(states, Trajectory):
+        key = id(states)
+        array = _trajectory_arrays.get(key)
+        if array is None:
+            array = state_array(states.states())
+            array.flags.writeable = False
+            _trajectory_arrays[key] = array
+            weakref.finalize(states, _trajectory_arrays.pop, key, None)
+        return array
+    states = list(states)
+    if not states:
+        return np.empty(0, dtype=STATE_DTYPE)
+    fields = _state_fields()[type(states[0])]
+    return np.fromiter(map(fields, states), dtype=STATE_DTYPE, count=len(states))
+
+
+def trajectory_arrays(trajectory):
+    """Trajectory states as a STATE_DTYPE array, see ``state_array``."""
+    return state_array(trajectory)
+
+
+class BatchSimulation:
+    """HolonomicDriveController path following for a batch of PID gains.
+
+    Every simulation steps through the trajectory in lock-step as NumPy array
+    operations, reproducing the per-state loop of ``calculate``,
+    ``toSwerveModuleStates`` and ``updateWithTime`` used in round-trip.ipynb.
+    The controller commands no rotation and the gyro reads zero, so the
+    module round trip is exact and odometry keeps the initial heading.
+
+    Gains broadcast against each other, results have a leading batch axis.
+    """
+
+    def __init__(self, trajectory, Kp, Ki=0.0, Kd=0.0, initial_pose=None):
+        states = state_array(trajectory)
+        Kp, Ki, Kd = (
+            gain[:, None] for gain in np.broadcast_arrays(*np.atleast_1d(Kp, Ki, Kd))
+        )
+        t = states["t"]
+        ref = np.column_stack((states["x"], states["y"]))
+        ff = states["velocity"][:, None] * np.column_stack(
+            (np.cos(states["heading"]), np.sin(states["heading"]))
+        )
+
+        if initial_pose is None:
+            start, heading = ref[0], states["heading"][0]
+        else:
+            start = (initial_pose.X(), initial_pose.Y())
+            heading = initial_pose.rotation().radians()
+        # odometry integrates robot-relative speeds at the fixed heading
+        c, s = math.cos(heading), math.sin(heading)
+        to_field = np.array([[c, s], [-s, c]])
+
+        n, m = len(Kp), len(t)
+        integrate, differentiate = np.any(Ki), np.any(Kd)
+        # time-major while stepping so each state writes one contiguous block
+        poses = np.empty((m, n, 2))
+        feedback = np.empty((m, n, 2))
+        pose = np.tile(np.asarray(start, dtype=float), (n, 1))
+        integral = np.zeros((n, 2))
+        for k in range(m):
+            dt = t[k] - t[k - 1] if k else 0.0
+            error = ref[k] - pose
+            fb = Kp * error
+            if integrate:
+                integral += Ki * error * dt
+                fb += integral
+            if differentiate and dt > 0:
+                fb -= Kd * (pose - poses[k - 1]) / dt
+            poses[k] = pose
+            feedback[k] = fb
+            speeds = ff[k] + fb
+            if heading:
+                speeds = speeds @ to_field
+            pose = pose + speeds * dt
+
+        self.t = t
+        self.poses = poses.transpose(1, 0, 2)
+        self.feedback = feedback.transpose(1, 0, 2)
+        self.speeds = ff[None, :, :] + self.feedback
+
+        errors = np.hypot(*(ref[None] - self.poses).transpose(2, 0, 1))
+        worst = errors.argmax(axis=1)
+        rows = np.arange(n)
+        self.translation_errors = errors
+        self.max_translation_error = errors[rows, worst]
+        self.translation_error_max_pos = self.poses[rows, worst]
+        fb_worst = np.abs(self.feedback).argmax(axis=1)
+        self.x_fb_max = self.feedback[rows, fb_worst[:, 0], 0]
+        self.y_fb_max = self.feedback[rows, fb_worst[:, 1], 1]
+
+    def __len__(self):
+        return len(self.max_translation_error)
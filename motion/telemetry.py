@@ -0,0 +1,843 @@
+"""Telemetry logs as DataFrames, with caching, derived columns and plots.
+
+matplotlib is imported on the first plot, so loading and analysing logs in
+headless workers only costs NumPy and pandas.
+"""
+import csv
+import hashlib
+import json
+import re
+import math
+import os
+import shutil
+import weakref
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .inventory import (
+    CACHE_DIR,
+    INVENTORY,
+    Inventory,
+    Measure,
+    Subscription,
+    column_names,
+)
+from .path import PathIndex, error_stats, wrap_degrees
+
+__all__ = [
+    "Telemetry",
+    "TrajectoryTelemetry",
+    "TelemetryCorpus",
+    "DerivedColumns",
+    "Segment",
+    "Column",
+    "resample",
+]
+
+
+def _pyplot():
+    from matplotlib import pyplot
+
+    return pyplot
+
+
+def _plot():
+    from . import plot
+
+    return plot
+
+
+Column = namedtuple("Column", ["name", "dtype"])
+
+TIMESTAMP_DTYPE = np.dtype(np.int64)
+SIGNAL_DTYPE = np.dtype(np.float32)
+
+
+def _column(name):
+    return Column(name, TIMESTAMP_DTYPE if name == "timestamp" else SIGNAL_DTYPE)
+
+
+def _read_header(path):
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+class Telemetry:
+    """A telemetry log, timestamps as int64 and every other column float32.
+
+    ``columns`` limits parsing to those log columns, plus the timestamp.
+    """
+
+    cache_dir = CACHE_DIR
+
+    def __init__(self, csv, cache=True, columns=None):
+        self.columns = columns
+        if isinstance(csv, pd.DataFrame):
+            self.csv = None
+            self.df = self._prepare(self._conform(csv))
+        else:
+            self.csv = Path(csv)
+            self.df = self._load(cache)
+
+    @cached_property
+    def schema(self):
+        """Log column to ``Column(name, dtype)``, or None to read every column."""
+        if self.columns is None:
+            return None
+        return {name: _column(name) for name in ("timestamp", *self.columns)}
+
+    def _used(self, header):
+        """The schema entries of ``header``, the first of any duplicate name."""
+        schema = self.schema
+        if schema is None:
+            return {name: _column(name) for name in header}
+        used, names = {}, set()
+        for name in header:
+            column = schema.get(name)
+            if column is not None and column.name not in names:
+                used[name] = column
+                names.add(column.name)
+        return used
+
+    def _read_csv(self):
+        used = self._used(_read_header(self.csv))
+        df = pd.read_csv(
+            self.csv,
+            usecols=list(used),
+            dtype={name: column.dtype for name, column in used.items()},
+        )
+        return df.rename(columns={name: column.name for name, column in used.items()})
+
+    def _conform(self, df):
+        """``df`` cut to the schema, columns cast only where their dtype differs."""
+        used = self._used(df.columns)
+        return pd.DataFrame(
+            {
+                column.name: df[name].to_numpy(column.dtype, copy=False)
+                for name, column in used.items()
+            },
+            index=df.index,
+        )
+
+    def _prepare(self, df):
+        return df
+
+    def _cache_params(self):
+        params = {"dtypes": [TIMESTAMP_DTYPE.str, SIGNAL_DTYPE.str]}
+        if self.schema is not None:
+            params["schema"] = sorted(
+                [name, column.name, column.dtype.str]
+                for name, column in self.schema.items()
+            )
+        return params
+
+    def _cache_path(self):
+        key = json.dumps(
+            {
+                "class": type(self).__name__,
+                "source": str(self.csv.resolve()),
+                "params": self._cache_params(),
+            },
+            sort_keys=True,
+        )
+        return self.cache_dir / hashlib.sha1(key.encode()).hexdigest()
+
+    def _load(self, cache):
+        if not cache:
+            return self._prepare(self._read_csv())
+
+        stat = self.csv.stat()
+        path = self._cache_path()
+        df = _read_cache(path, stat)
+        if df is None:
+            df = self._prepare(self._read_csv())
+            _write_cache(path, df, self.csv, stat)
+        return df
+
+    @cached_property
+    def timestamps(self):
+        return self.df["timestamp"].to_numpy()
+
+    def resample(self, dt=20, columns=None, method="linear", interval=None):
+        """Columns on a uniform ``dt`` ms grid from the first to last timestamp.
+
+        ``method`` is "linear" or "zoh" (zero-order hold, the last sample at or
+        before each grid time). All columns are interpolated together as one
+        2-D array.
+        """
+        df = self.df if interval is None else self.df[interval]
+        if columns is None:
+            columns = df.select_dtypes("number").columns.drop(
+                "timestamp", errors="ignore"
+            )
+            columns = columns.tolist()
+        timestamps = df["timestamp"].to_numpy()
+        if len(timestamps) == 0:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name="timestamp"))
+        grid = np.arange(timestamps[0], timestamps[-1] + 1, dt)
+        values = _resample(timestamps, df[columns].to_numpy(), grid, method)
+        return pd.DataFrame(
+            values, columns=columns, index=pd.Index(grid, name="timestamp")
+        )
+
+    def dt(self, interval=None):
+        timestamps = self.timestamps if interval is None else self.timestamps[interval]
+        return np.diff(timestamps)
+
+    def jitter(self, interval=None, nominal=None, gap=1.5):
+        """Sample period statistics, gaps and dropped frames.
+
+        ``nominal`` defaults to the median period. A period of at least ``gap``
+        times nominal is a gap, and counts ``round(dt / nominal) - 1`` dropped
+        frames.
+        """
+        dt = self.dt(interval)
+        if len(dt) == 0:
+            return pd.Series(dtype=float, name=self.name)
+        if nominal is None:
+            nominal = np.median(dt)
+        gaps = dt >= gap * nominal
+        percentiles = np.percentile(dt, [50, 95, 99])
+        return pd.Series(
+            {
+                "samples": len(dt) + 1,
+                "duration": dt.sum(),
+                "nominal_dt": nominal,
+                "mean_dt": dt.mean(),
+                "std_dt": dt.std(),
+                "min_dt": dt.min(),
+                "p50_dt": percentiles[0],
+                "p95_dt": percentiles[1],
+                "p99_dt": percentiles[2],
+                "max_dt": dt.max(),
+                "gaps": np.count_nonzero(gaps),
+                "dropped_frames": int(np.rint(dt[gaps] / nominal).sum() - gaps.sum()),
+            },
+            name=self.name,
+        )
+
+    def plot_jitter(self, interval=None, ax=None, bins=20):
+        if ax is None:
+            _, ax = _pyplot().subplots()
+        ax.hist(self.dt(interval), bins=bins)
+        ax.set_xlabel("dt (ms)")
+        ax.set_ylabel("samples")
+        return ax
+
+    def plot(self, columns, interval=None, ax=None, decimate=True, **kwargs):
+        """Columns against timestamp, one line each, labelled by column."""
+        df = self.df if interval is None else self.df[interval]
+        if ax is None:
+            _, ax = _pyplot().subplots()
+        if isinstance(columns, str):
+            columns = [columns]
+
+        plot = _plot().Decimation(ax, df["timestamp"], enabled=decimate)
+        for column in columns:
+            plot.plot(df[column], label=column, **kwargs)
+        plot.update()
+        ax.legend()
+        ax.set_xlabel("milliseconds")
+        return ax
+
+    @property
+    def name(self):
+        return self.csv.stem if self.csv is not None else None
+
+    @classmethod
+    def prune_cache(cls, all=False):
+        """Remove cache entries whose source log changed or no longer exists."""
+        if not cls.cache_dir.exists():
+            return 0
+
+        pruned = 0
+        for entry in cls.cache_dir.iterdir():
+            if not entry.is_dir():
+                continue  # log entries are directories, the inventory cache is not
+            meta = _read_cache_meta(entry)
+            stale = meta is None or all
+            if not stale:
+                source = Path(meta["source"])
+                stale = not source.exists() or not _cache_matches(meta, source.stat())
+            if stale:
+                shutil.rmtree(entry, ignore_errors=True)
+                pruned += 1
+        return pruned
+
+
+def _cache_matches(meta, stat):
+    return meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns
+
+
+def _read_cache_meta(path):
+    try:
+        with open(path / "meta.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_cache(path, stat):
+    meta = _read_cache_meta(path)
+    if meta is None or not _cache_matches(meta, stat):
+        return None
+
+    # copy-on-write maps keep warm loads lazy while leaving the frame writable
+    columns = {
+        name: np.load(path / f"{i}.npy", mmap_mode="c")
+        for i, name in enumerate(meta["columns"])
+    }
+    return pd.DataFrame(columns, columns=meta["columns"], copy=False)
+
+
+def _write_cache(path, df, source, stat):
+    if any(dtype.hasobject for dtype in df.dtypes):
+        # header-only logs parse as object columns, which can't be mapped
+        return
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for i, name in enumerate(df.columns):
+        np.save(tmp / f"{i}.npy", df[name].to_numpy())
+
+    meta = {
+        "source": str(source.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "columns": list(df.columns),
+    }
+    with open(tmp / "meta.json", "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # another process won the race, its entry is just as good
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+RESAMPLE_METHODS = ("linear", "zoh")
+
+
+def _resample(timestamps, values, grid, method):
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(
+            f"unknown resample method {method!r}, use one of {RESAMPLE_METHODS}"
+        )
+    # index of the last sample at or before each grid time
+    i = np.clip(timestamps.searchsorted(grid, side="right") - 1, 0, len(timestamps) - 1)
+    if method == "zoh":
+        return values[i]
+    j = np.minimum(i + 1, len(timestamps) - 1)
+    span = (timestamps[j] - timestamps[i]).astype(float)
+    frac = np.divide(
+        grid - timestamps[i], span, out=np.zeros(len(grid)), where=span > 0
+    )
+    values = values.astype(float, copy=False)
+    return values[i] + frac[:, None] * (values[j] - values[i])
+
+
+def resample(telemetries, dt=20, columns=None, method="linear", align="start"):
+    """Several logs on one ``dt`` ms grid, columns keyed by (log, column).
+
+    With ``align="start"`` the index is ms since each log's first sample, so
+    runs recorded at different times line up; ``align="timestamp"`` keeps
+    absolute timestamps. Logs shorter than the grid are NaN past their end.
+    """
+    if not isinstance(telemetries, dict):
+        telemetries = {
+            t.name if t.name is not None else i: t for i, t in enumerate(telemetries)
+        }
+    frames = {}
+    for key, t in telemetries.items():
+        df = t.resample(dt=dt, columns=columns, method=method)
+        if align == "start" and len(df):
+            df.index = pd.Index(df.index - df.index[0], name="time")
+        frames[key] = df
+    return pd.concat(frames, axis=1)
+
+
+Segment = namedtuple("Segment", ["start", "end", "interval"])
+
+
+class DerivedColumns:
+    """Columns computed from a telemetry frame on first access and memoized."""
+
+    registry = {}
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
+        self.columns = {}
+
+    @classmethod
+    def register(cls, name):
+        def decorator(fn):
+            cls.registry[name] = fn
+            return fn
+
+        return decorator
+
+    def __getitem__(self, name):
+        if name not in self.columns:
+            values = self.registry[name](self.telemetry)
+            self.columns[name] = pd.Series(
+                values, index=self.telemetry.df.index, name=name
+            )
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.registry
+
+    def __iter__(self):
+        return iter(self.registry)
+
+    def __repr__(self):
+        return f"DerivedColumns(computed={list(self.columns)!r},available={list(self.registry)!r})"
+
+
+class TrajectoryTelemetry(Telemetry):
+    """A trajectory run log, read through the columns of ``subscription``.
+
+    Each subscribed measure is parsed under its ``ALIASES`` name, prefixed
+    ``t<n>_`` for numbered devices such as "TalonFX 10", so every drive
+    motor in the inventory gets a column and other columns are skipped.
+    """
+
+    ALIASES = {
+        Measure.TRAJECTORY_X: "traj_x",
+        Measure.TRAJECTORY_Y: "traj_y",
+        Measure.TRAJECTORY_VELOCITY: "traj_vel",
+        Measure.TRAJECTORY_ACCELERATION: "traj_accel",
+        Measure.TRAJECTORY_DEGREES: "traj_deg",
+        Measure.TRAJECTORY_TIME: "traj_time",
+        Measure.HC_VX: "hc_vx",
+        Measure.HC_VY: "hc_vy",
+        Measure.HC_OMEGA: "hc_omega",
+        Measure.ODOMETRY_X: "odom_x",
+        Measure.ODOMETRY_Y: "odom_y",
+        Measure.GYRO_ROTATION2D_DEGREE: "gyro_deg",
+        Measure.ODOMETRY_ROTATION2D_DEGREE: "odom_deg",
+        Measure.CLOSED_LOOP_TARGET: "setpoint",
+        Measure.SELECTED_SENSOR_VELOCITY: "velocity",
+    }
+    # schemas by Inventory and class, as Inventory.load reuses an unchanged file's
+    _schemas = weakref.WeakKeyDictionary()
+
+    def __init__(self, csv, cache=True, **kwargs):
+        self.drive_cpr = kwargs.get("drive_cpr", 2048)
+        self.drive_gear_ratio = kwargs.get(
+            "drive_gear_ratio", (25.0 / 44.0) * (15.0 / 45.0)
+        )
+        self.wheel_diameter_in = kwargs.get("wheel_diameter_in", 3.0 * (508.0 / 504.0))
+        self.wheel_circum_m = kwargs.get(
+            "wheel_circum_m", math.pi * 0.0254 * self.wheel_diameter_in
+        )
+        self.inventory = kwargs.get("inventory", INVENTORY)
+        super().__init__(csv, cache=cache)
+        self.derived = DerivedColumns(self)
+
+    @cached_property
+    def schema(self):
+        inventory = self._inventory()
+        schemas = self._schemas.setdefault(inventory, {})
+        if type(self) not in schemas:
+            schemas[type(self)] = self._build_schema(inventory)
+        return schemas[type(self)]
+
+    def _inventory(self):
+        if isinstance(self.inventory, Inventory):
+            return self.inventory
+        return Inventory.load(self.inventory, cache_dir=self.cache_dir)
+
+    def _build_schema(self, inventory):
+        schema = {"timestamp": _column("timestamp")}
+        for measurable, measure in self.subscription(inventory).items():
+            name = self.ALIASES[measure]
+            device = re.search(r"(\d+)$", measurable.description)
+            if device:
+                name = f"t{device.group(1)}_{name}"
+            for column in column_names(measurable, measure):
+                schema.setdefault(column, Column(name, SIGNAL_DTYPE))
+        return schema
+
+    def _cache_params(self):
+        return {
+            **super()._cache_params(),
+            "drive_cpr": self.drive_cpr,
+            "drive_gear_ratio": self.drive_gear_ratio,
+            "wheel_diameter_in": self.wheel_diameter_in,
+        }
+
+    def _prepare(self, df):
+        df["hc_omega"] = df["hc_omega"] * -1
+        df["traj_time"] = df["traj_time"] * 1000  # sec to msec
+        return df
+
+    @cached_property
+    def segments(self):
+        """Every trajectory run in the log, found from traj_vel transitions."""
+        active = self.df["traj_vel"].to_numpy() > 0.0
+        edges = np.diff(np.concatenate(([0], active.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        # a run ends on the first idle sample after it, or the end of the log
+        stops = np.minimum(np.flatnonzero(edges == -1), len(active) - 1)
+        return [
+            Segment(self.timestamps[i], self.timestamps[j], slice(i, j + 1))
+            for i, j in zip(starts, stops)
+        ]
+
+    @cached_property
+    def start(self):
+        if self.segments:
+            return self.segments[0].start
+        return self.timestamps[0]
+
+    @cached_property
+    def end(self):
+        if self.segments:
+            return self.segments[0].end
+        return self.timestamps[-1]
+
+    def end_pose(self, end=None):
+        if end is None:
+            end = self.end
+        i = self.timestamps.searchsorted(end)
+        return self.df.iloc[i : i + 1][
+            ["traj_x", "traj_y", "odom_x", "odom_y", "odom_deg"]
+        ]
+
+    def make_interval(self, start=None, end=None):
+        if start == None:
+            start = self.start
+
+        if end == None:
+            end = self.end
+
+        return slice(
+            self.timestamps.searchsorted(start, side="left"),
+            self.timestamps.searchsorted(end, side="right"),
+        )
+
+    @cached_property
+    def interval(self):
+        return self.make_interval()
+
+    def path_index(self, interval=None):
+        """Spatial index over the traj_x/traj_y path of ``interval``."""
+        if interval is None:
+            interval = self.interval
+        df = self.df[interval]
+        return PathIndex(df["traj_x"].to_numpy(), df["traj_y"].to_numpy())
+
+    def path_errors(self, interval=None, horizon=1.0):
+        """Odometry errors measured against the path rather than the timeline.
+
+        cross_track is the distance from the odometry pose to the nearest
+        point of the path, positive to the left of travel. along_track is how
+        far that point trails the time-aligned trajectory pose along the
+        path. heading_error is odom_deg less traj_deg at that point; traj_deg
+        is the path tangent, so for a swerve drive holding its yaw this is
+        the yaw relative to the direction of travel. Matches are limited to
+        the stretch of path within ``horizon`` meters of the time-aligned
+        pose, so a run crossing its own path stays on the pass it is
+        driving; None searches the whole path.
+        """
+        if interval is None:
+            interval = self.interval
+        df = self.df[interval]
+        path = self.path_index(interval)
+        reference = path.stations[path.vertex]
+        p = path.project(
+            df["odom_x"].to_numpy(),
+            df["odom_y"].to_numpy(),
+            near=reference,
+            horizon=horizon,
+        )
+        degrees = df["traj_deg"].to_numpy()[path.first]
+        start, end = degrees[p.segment], degrees[p.segment + 1]
+        traj_deg = start + p.fraction * wrap_degrees(end - start)
+        return pd.DataFrame(
+            {
+                "cross_track": p.offset,
+                "along_track": reference - p.station,
+                "heading_error": wrap_degrees(df["odom_deg"].to_numpy() - traj_deg),
+                "station": p.station,
+            },
+            index=df.index,
+        )
+
+    def path_error_summary(self, interval=None, horizon=1.0):
+        """RMS, p95 and max of each path error, one row per error."""
+        errors = self.path_errors(interval, horizon).drop(columns="station")
+        return pd.DataFrame({name: error_stats(errors[name]) for name in errors}).T
+
+    def plot_trajectory(self, interval=None, ax=None, decimate=True):
+        if interval is None:
+            interval = self.interval
+
+        if ax == None:
+            _, ax = _pyplot().subplots()
+
+        df = self.df[interval]
+        plot = _plot().Decimation(ax, df["timestamp"], xy=True, enabled=decimate)
+        plot.plot(df["traj_y"], x=df["traj_x"], label="trajectory")
+        plot.plot(df["odom_y"], x=df["odom_x"], label="odometry")
+        plot.update()
+        ax.legend()
+        ax.grid()
+        ax.set_ylabel("meters")
+        ax.set_xlabel("meters")
+
+    def plot_error(self, interval=None, ax=None, decimate=True):
+        if interval is None:
+            interval = self.interval
+
+        if ax == None:
+            _, ax = _pyplot().subplots()
+
+        plot = _plot().Decimation(ax, self.df["timestamp"][interval], enabled=decimate)
+        plot.plot(self.derived["x_error"][interval], label="x error")
+        plot.plot(self.derived["y_error"][interval], label="y error")
+        plot.update()
+        ax.legend()
+        ax.grid()
+        ax.set_ylabel("meters")
+        ax.set_xlabel("milliseconds")
+
+    def _drive_mps(self, counts_100ms):
+        motor_rot_100ms = counts_100ms / self.drive_cpr
+        wheel_rot_100ms = motor_rot_100ms * self.drive_gear_ratio
+        meters_100ms = wheel_rot_100ms * self.wheel_circum_m
+        return meters_100ms * 10
+
+    def plot_velocity(
+        self,
+        interval=None,
+        ax=None,
+        trajectory=True,
+        controller=True,
+        setpoint=True,
+        drive=True,
+        decimate=True,
+    ):
+        if interval is None:
+            interval = self.interval
+
+        if ax == None:
+            _, ax = _pyplot().subplots()
+
+        plot = _plot().Decimation(ax, self.df["timestamp"][interval], enabled=decimate)
+        linestyle = ":" if controller else "-"
+
+        if trajectory:
+            traj_vel = self.df["traj_vel"][interval]
+            plot.plot(traj_vel, label="trajectory")
+
+        if controller:
+            hc_vel = self.derived["hc_speed"][interval]
+            plot.plot(hc_vel, label="holonomic controller", color="orange")
+
+        if setpoint:
+            setpoint_mps = self.derived["setpoint_mps"][interval]
+            plot.plot(
+                setpoint_mps,
+                label="talon setpoint",
+                color="green",
+                linestyle=linestyle,
+            )
+
+        if drive:
+            drive_mps = self.derived["drive_mps"][interval]
+            plot.plot(
+                drive_mps,
+                label="talon velocity",
+                color="purple",
+                linestyle=linestyle,
+            )
+
+        if controller and trajectory:
+            plot.fill_between(traj_vel, hc_vel, color="orange", alpha=0.2)
+
+        if setpoint and controller:
+            plot.fill_between(setpoint_mps, hc_vel, color="green", alpha=0.1)
+
+        if setpoint and drive:
+            plot.fill_between(drive_mps, setpoint_mps, color="purple", alpha=0.1)
+
+        plot.update()
+        ax.legend()
+        ax.grid()
+        ax.set_ylabel("meters/second")
+        ax.set_xlabel("milliseconds")
+
+    def plot_yaw(
+        self, interval=None, ax=None, gyro=True, controller=True, decimate=True
+    ):
+        if interval is None:
+            interval = self.interval
+
+        if ax == None:
+            _, ax = _pyplot().subplots()
+
+        df = self.df[interval]
+        plot = _plot().Decimation(ax, df["timestamp"], enabled=decimate)
+        plot.plot(df["odom_deg"], label="odometry")
+        if gyro:
+            plot.plot(df["gyro_deg"], label="gyro")
+        ax.legend(loc="upper left")
+
+        ax.set_ylabel("degrees")
+        ax.set_xlabel("milliseconds")
+
+        plot.update()
+
+        if controller:
+            right = ax.twinx()
+            omega = _plot().Decimation(right, df["timestamp"], enabled=decimate)
+            omega.plot(df["hc_omega"], label="controller omega (right)", color="C2")
+            right.legend(loc="upper right")
+            omega.update()
+
+    def subscription(self, inventory=None):
+        sub = Subscription(self._inventory() if inventory is None else inventory)
+        tc = sub.measurable_by_type("frc.robot.commands.DriveTrajectoryCommand")
+        ds = sub.measurable_by_type("frc.robot.subsystems.DriveSubsystem")
+        fxs = sub.inventory.by_type.get(
+            "org.strykeforce.thirdcoast.talon.TalonFXMeasurable", []
+        )
+        sub.append(tc.id, Measure.TRAJECTORY_X.id)
+        sub.append(tc.id, Measure.TRAJECTORY_Y.id)
+        sub.append(tc.id, Measure.TRAJECTORY_VELOCITY.id)
+        sub.append(tc.id, Measure.TRAJECTORY_ACCELERATION.id)
+        sub.append(tc.id, Measure.TRAJECTORY_DEGREES.id)
+        sub.append(tc.id, Measure.TRAJECTORY_TIME.id)
+        sub.append(tc.id, Measure.HC_VY.id)
+        sub.append(tc.id, Measure.HC_VX.id)
+        sub.append(tc.id, Measure.HC_OMEGA.id)
+        sub.append(ds.id, Measure.ODOMETRY_X.id)
+        sub.append(ds.id, Measure.ODOMETRY_Y.id)
+        sub.append(ds.id, Measure.GYRO_ROTATION2D_DEGREE.id)
+        sub.append(ds.id, Measure.ODOMETRY_ROTATION2D_DEGREE.id)
+        for fx in fxs:
+            sub.append(fx.id, Measure.CLOSED_LOOP_TARGET.id)
+        for fx in fxs:
+            sub.append(fx.id, Measure.SELECTED_SENSOR_VELOCITY.id)
+        return sub
+
+    def __repr__(self):
+        return super().__repr__()
+
+
+@DerivedColumns.register("x_error")
+def _x_error(t):
+    return t.df["odom_x"].to_numpy() - t.df["traj_x"].to_numpy()
+
+
+@DerivedColumns.register("y_error")
+def _y_error(t):
+    return t.df["odom_y"].to_numpy() - t.df["traj_y"].to_numpy()
+
+
+@DerivedColumns.register("hc_speed")
+def _hc_speed(t):
+    return np.hypot(t.df["hc_vx"].to_numpy(), t.df["hc_vy"].to_numpy())
+
+
+def _abs_mean(df):
+    if df.columns.empty:
+        return np.full(len(df), np.nan)
+    return np.abs(df.to_numpy()).mean(axis=1)
+
+
+@DerivedColumns.register("talon_setpoint_avg")
+def _talon_setpoint_avg(t):
+    return _abs_mean(t.df.filter(regex=r"^t\d+_setpoint$"))
+
+
+@DerivedColumns.register("talon_velocity_avg")
+def _talon_velocity_avg(t):
+    return _abs_mean(t.df.filter(regex=r"^t\d+_velocity$"))
+
+
+@DerivedColumns.register("setpoint_mps")
+def _setpoint_mps(t):
+    return t._drive_mps(t.derived["talon_setpoint_avg"].to_numpy())
+
+
+@DerivedColumns.register("drive_mps")
+def _drive_mps(t):
+    return t._drive_mps(t.derived["talon_velocity_avg"].to_numpy())
+
+
+def _summarize_run(path, kwargs):
+    return {"path": str(path), **_run_summary(TrajectoryTelemetry(path, **kwargs))}
+
+
+def _run_summary(t):
+    """The corpus summary of a loaded run, less its path."""
+    run = t.df[t.interval]
+    end_pose = t.end_pose().iloc[0]
+    summary = {
+        "start": t.start,
+        "end": t.end,
+        "segments": len(t.segments),
+    }
+    summary.update(end_pose.to_dict())
+    for error in ("x_error", "y_error"):
+        values = t.derived[error][t.interval].to_numpy()
+        summary[f"{error}_max"] = np.abs(values).max()
+        summary[f"{error}_rms"] = np.sqrt(np.mean(values ** 2))
+    for error, stats in t.path_error_summary().iterrows():
+        summary.update({f"{error}_{stat}": value for stat, value in stats.items()})
+    summary["traj_vel_max"] = run["traj_vel"].max()
+    return summary
+
+
+class TelemetryCorpus:
+    def __init__(self, directory, pattern="tcr-*.csv", max_workers=None, **kwargs):
+        self.directory = Path(directory)
+        self.paths = sorted(self.directory.glob(pattern))
+        self.max_workers = max_workers
+        self.kwargs = kwargs
+        self.errors = {}
+
+    @cached_property
+    def summary(self):
+        """One row per run, loaded across a process pool."""
+        rows = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(_summarize_run, path, self.kwargs): path
+                for path in self.paths
+            }
+            for future, path in futures.items():
+                try:
+                    rows.append(future.result())
+                except (pd.errors.EmptyDataError, KeyError, IndexError) as e:
+                    self.errors[path.name] = e
+
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df.insert(0, "name", df["path"].map(lambda p: Path(p).stem))
+            df.set_index("name", inplace=True)
+        return df
+
+    def __getitem__(self, name):
+        # workers have already filled the telemetry cache, so this is a warm load
+        return TrajectoryTelemetry(self.directory / f"{name}.csv", **self.kwargs)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return (self[path.stem] for path in self.paths)
+
+    def __repr__(self):
+        return f"TelemetryCorpus(directory={str(self.directory)!r},runs={len(self)})"
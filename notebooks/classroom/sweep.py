@@ -0,0 +1,195 @@
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from wpimath.geometry import Pose2d, Rotation2d, Translation2d
+from wpimath.trajectory import TrajectoryConfig, TrajectoryGenerator
+from wpimath.trajectory.constraint import CentripetalAccelerationConstraint
+
+from motion import BatchSimulation, trajectory_arrays
+
+# round-trip.ipynb path: start and end are (x, y, degrees), interior is (x, y)
+WAYPOINTS = ((0.0, 0.0, 0.0), ((1.0, 1.0), (2.0, -1.0)), (3.0, 0.0, 0.0))
+
+TRAJECTORY_PARAMS = ("max_velocity", "max_acceleration", "max_centripetal_acceleration")
+GAIN_PARAMS = ("Kp", "Ki", "Kd")
+DEFAULTS = {
+    "max_velocity": 1.0,
+    "max_acceleration": 2.0,
+    "max_centripetal_acceleration": None,
+    "Kp": 10.0,
+    "Ki": 0.0,
+    "Kd": 0.0,
+}
+
+
+def grid(**axes):
+    """Every combination of the given parameter values."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def random_cases(n, seed=None, **ranges):
+    """``n`` cases drawn uniformly from ``(low, high)`` ranges or from lists."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, values in ranges.items():
+        if isinstance(values, tuple):
+            columns[name] = rng.uniform(*values, size=n)
+        else:
+            columns[name] = rng.choice(values, size=n)
+    return [
+        {name: column[i].item() for name, column in columns.items()} for i in range(n)
+    ]
+
+
+def case_id(case):
+    key = json.dumps(case, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=256)
+def generate_trajectory(
+    waypoints, max_velocity, max_acceleration, max_centripetal_acceleration
+):
+    """Trajectory states as arrays, generated once per distinct config and process."""
+    (x0, y0, deg0), interior, (x1, y1, deg1) = waypoints
+    config = TrajectoryConfig(
+        maxVelocity=max_velocity, maxAcceleration=max_acceleration
+    )
+    if max_centripetal_acceleration is not None:
+        config.addConstraint(
+            CentripetalAccelerationConstraint(
+                maxCentripetalAcceleration=max_centripetal_acceleration
+            )
+        )
+    trajectory = TrajectoryGenerator.generateTrajectory(
+        start=Pose2d(x0, y0, Rotation2d.fromDegrees(deg0)),
+        interiorWaypoints=[Translation2d(x, y) for x, y in interior],
+        end=Pose2d(x1, y1, Rotation2d.fromDegrees(deg1)),
+        config=config,
+    )
+    return trajectory.totalTime(), trajectory_arrays(trajectory)
+
+
+def _run_group(waypoints, config, cases):
+    total_time, states = generate_trajectory(waypoints, *config)
+    gains = {name: [case[name] for case in cases] for name in GAIN_PARAMS}
+    sim = BatchSimulation(states, **gains)
+    return pd.DataFrame(
+        {
+            "case_id": [case["case_id"] for case in cases],
+            **{name: [case[name] for case in cases] for name in DEFAULTS},
+            "trajectory_time": total_time,
+            "max_translation_error": sim.max_translation_error,
+            "x_fb_max": sim.x_fb_max,
+            "y_fb_max": sim.y_fb_max,
+        }
+    )
+
+
+class Sweep:
+    """Trajectory and controller parameter sweep fanned out over a process pool.
+
+    Cases sharing a trajectory config run as one BatchSimulation of up to
+    ``batch_size`` gain sets. Finished batches are appended to the
+    ``checkpoint`` CSV, and cases already in it are skipped, so an
+    interrupted sweep picks up where it stopped. A row left half-written by
+    the interruption is dropped and its case runs again.
+    """
+
+    def __init__(
+        self,
+        cases,
+        waypoints=WAYPOINTS,
+        checkpoint="sweep.csv",
+        max_workers=None,
+        batch_size=1000,
+    ):
+        self.cases = []
+        for case in cases:
+            case = {**DEFAULTS, **case}
+            case["case_id"] = case_id(case)
+            self.cases.append(case)
+        self.waypoints = (
+            tuple(waypoints[0]),
+            tuple(tuple(point) for point in waypoints[1]),
+            tuple(waypoints[2]),
+        )
+        self.checkpoint = Path(checkpoint)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def _drop_partial_row(self):
+        """Truncate the checkpoint after its last complete row."""
+        if not self.checkpoint.exists():
+            return
+        with open(self.checkpoint, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            start = max(0, size - (1 << 16))
+            f.seek(start)
+            tail = f.read()
+            if tail.endswith(b"\n") or not tail:
+                return
+            f.truncate(start + tail.rfind(b"\n") + 1)
+
+    def _append(self, rows):
+        header = not self.checkpoint.exists() or self.checkpoint.stat().st_size == 0
+        with open(self.checkpoint, "a", newline="") as f:
+            rows.to_csv(f, header=header, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completed(self):
+        self._drop_partial_row()
+        if not self.checkpoint.exists():
+            return set()
+        return set(pd.read_csv(self.checkpoint, usecols=["case_id"])["case_id"])
+
+    def pending(self):
+        done = self.completed()
+        return [case for case in self.cases if case["case_id"] not in done]
+
+    def batches(self, cases):
+        groups = {}
+        for case in cases:
+            config = tuple(case[name] for name in TRAJECTORY_PARAMS)
+            groups.setdefault(config, []).append(case)
+        for config, group in groups.items():
+            for i in range(0, len(group), self.batch_size):
+                yield config, group[i : i + self.batch_size]
+
+    def run(self, progress=None):
+        pending = self.pending()
+        total, done = len(pending), 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(_run_group, self.waypoints, config, batch): len(batch)
+                for config, batch in self.batches(pending)
+            }
+            for future in as_completed(futures):
+                self._append(future.result())
+                done += futures[future]
+                if progress is not None:
+                    progress(done, total)
+        return self.results()
+
+    def results(self):
+        self._drop_partial_row()
+        if not self.checkpoint.exists():
+            return pd.DataFrame()
+        results = pd.read_csv(self.checkpoint).drop_duplicates("case_id", keep="last")
+        ids = {case["case_id"] for case in self.cases}
+        return results[results["case_id"].isin(ids)].set_index("case_id")
+
+    def __len__(self):
+        return len(self.cases)
+
+    def __repr__(self):
+        return f"Sweep(cases={len(self)},checkpoint={str(self.checkpoint)!r})"
@@ -1,33 +1,209 @@
 from copyreg import pickle
 from mimetypes import init
+import codecs
+import json
+import re
+import numpy as np
 import pandas as pd
 import requests
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import cached_property
 import pytz
 from pathlib import Path
 import pickle
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TIMEOUT = 10.0
+CHUNK_SIZE = 1 << 20
+
+
+def make_session(pool_size=16, retries=3, backoff=0.5):
+    """Keep-alive session that retries failed requests with exponential backoff."""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = make_session()
+
+
+def _get_json(url, session, timeout):
+    r = (session or SESSION).get(url, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _brackets(text):
+    """Where the last complete top level array of ``text`` ends, and where a
+    closing bracket with no opening one is, or -1.
+
+    Brackets inside JSON strings are skipped, telling quotes from escaped
+    quotes by the run of backslashes before them.
+    """
+    chars = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    positions = np.arange(len(chars))
+    backslash = chars == ord("\\")
+    # index of the last character that is not a backslash, at each position
+    plain = np.maximum.accumulate(np.where(backslash, -1, positions))
+    quotes = np.flatnonzero(chars == ord('"'))
+    run = quotes - 1 - plain[np.maximum(quotes - 1, 0)]
+    run[quotes == 0] = 0
+    strings = np.zeros(len(chars) + 1, dtype=np.int8)
+    strings[quotes[run % 2 == 0] + 1] = 1
+    outside = np.cumsum(strings[:-1], dtype=np.int64) % 2 == 0
+    step = ((chars == ord("[")) & outside).astype(np.int64)
+    step -= (chars == ord("]")) & outside
+    depth = np.cumsum(step)
+    closes = np.flatnonzero(step < 0)
+    unmatched = closes[depth[closes] < 0]
+    end = unmatched[0] if len(unmatched) else -1
+    complete = closes[depth[closes] == 0]
+    if end >= 0:
+        complete = complete[complete < end]
+    return (complete[-1] + 1 if len(complete) else 0), end
+
+
+class TraceDecoder:
+    """Incremental decoder for an action response body.
+
+    The ``traces`` array of ``[millis, measure, value]`` triples is parsed as
+    chunks arrive and appended to per-measure NumPy arrays, so the response is
+    never held as Python objects. The rest of the document is decoded as JSON.
+    """
+
+    TRACES = re.compile(r'"traces"\s*:\s*\[')
+
+    def __init__(self) -> None:
+        self.state = "head"
+        self.head = ""
+        self.buffer = ""
+        self.codes = {}
+        self.millis = []
+        self.values = []
+        self.frame = None
+
+    def feed(self, text):
+        self.buffer += text
+        if self.state == "head":
+            m = self.TRACES.search(self.buffer)
+            if m is None:
+                return
+            self.head = self.buffer[: m.start()] + '"traces": []'
+            self.buffer = self.buffer[m.end() :]
+            self.state = "traces"
+
+        if self.state == "traces":
+            # the buffer always starts between traces, outside any string
+            complete, end = _brackets(self.buffer)
+            if end >= 0:
+                self._decode(self.buffer[:end])
+                self.buffer = self.buffer[end + 1 :]
+                self.state = "tail"
+            else:
+                self._decode(self.buffer[:complete])
+                self.buffer = self.buffer[complete:]
+
+    def _decode(self, text):
+        text = text.lstrip(" \t\r\n,")
+        if not text:
+            return
+        millis, names, values = zip(*json.loads(f"[{text}]"))
+        millis = np.fromiter(millis, np.int64, len(millis))
+        try:
+            values = np.fromiter(values, np.float64, len(values))
+        except (TypeError, ValueError):
+            values = np.array([_number(value) for value in values])
+        codes, uniques = pd.factorize(np.array(names, dtype=object))
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        for name, rows in zip(uniques, np.split(order, bounds)):
+            code = self.codes.setdefault(name, len(self.codes))
+            if code == len(self.millis):
+                self.millis.append([])
+                self.values.append([])
+            self.millis[code].append(millis[rows])
+            self.values[code].append(values[rows])
+
+    def _compact(self, code):
+        millis = np.concatenate(self.millis[code])
+        values = np.concatenate(self.values[code])
+        self.millis[code] = self.values[code] = None
+        # keep the last value reported for each millis, like drop_duplicates(keep="last")
+        _, last = np.unique(millis[::-1], return_index=True)
+        last = len(millis) - 1 - last
+        return millis[last], values[last]
+
+    def close(self):
+        if self.state != "tail":
+            raise ValueError("incomplete action response, no end of traces")
+        return json.loads(self.head + self.buffer)
+
+    def dataframe(self):
+        """The traces as millis by measure, built on the first call and reused."""
+        if self.frame is not None:
+            return self.frame
+        names = sorted(self.codes)
+        columns = [self._compact(self.codes[name]) for name in names]
+        index = np.unique(np.concatenate([millis for millis, _ in columns] or [[]]))
+        data = np.full((len(index), len(names)), np.nan)
+        for j, (millis, values) in enumerate(columns):
+            data[index.searchsorted(millis), j] = values
+        self.frame = pd.DataFrame(
+            data,
+            index=pd.Index(index.astype(np.int64), name="millis"),
+            columns=pd.Index(names, name="measure"),
+        )
+        return self.frame
+
+
+def _get_action(url, session, timeout):
+    r = (session or SESSION).get(url, timeout=timeout, stream=True)
+    r.raise_for_status()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    decoder = TraceDecoder()
+    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+        decoder.feed(utf8.decode(chunk))
+    decoder.feed(utf8.decode(b"", final=True))
+    return decoder.close(), decoder.dataframe()
 
 
 class Activity:
-    def __init__(self, url: str) -> None:
-        r = requests.get(url)
-        activity = r.json()
+    def __init__(self, url: str, session=None, timeout=TIMEOUT) -> None:
+        activity = _get_json(url, session, timeout)
 
+        self.url = url
         self.id = activity["id"]
         self.name = activity["name"]
         self.meta = activity["meta"]
         self.description = activity["meta"]["description"]
         self.actions = activity["actions"]
 
+    def action_url(self, id):
+        base = self.url.rsplit("/activity/", 1)[0]
+        return f"{base}/action/{id}"
 
-class Action:
-    def __init__(self, url: str) -> None:
-        r = requests.get(url)
-        action = r.json()
 
-        df = pd.DataFrame(action["traces"], columns=["millis", "measure", "value"])
-        df = df.drop_duplicates(subset=["millis", "measure"], keep="last")
-        self.dataframe = df.pivot(index="millis", columns="measure", values="value")
+class Action:
+    def __init__(self, url: str, session=None, timeout=TIMEOUT) -> None:
+        action, self.dataframe = _get_action(url, session, timeout)
 
         self.id = action["id"]
         self.name = action["name"]
@@ -41,9 +217,176 @@ class Action:
     def created_at_str(self):
         return self.created_at.strftime("%Y-%m-%d %H:%M")
 
-    def dump(self):
-        basename = self.created_at.strftime("%Y-%m-%d-%H-%M")
-        file = f"{basename}.pickle"
-        path = Path("data") / file
-        with path.open("wb") as f:
-            pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
+    @property
+    def key(self):
+        """Archive key, the id alone is reused once the robot's counter resets."""
+        return f"{self.id}-{self.created_at:%Y-%m-%d-%H-%M-%S}"
+
+    def dump(self, archive="data"):
+        ActionArchive(archive).add(self)
+
+
+def fetch_actions(
+    activity, max_workers=8, session=None, timeout=TIMEOUT, progress=None
+):
+    """Fetch every action of an activity concurrently, in activity order.
+
+    ``progress`` is called as ``progress(done, total)`` after each action.
+    A session created here is closed before returning, a passed one is not.
+    """
+    if session is None:
+        with make_session(pool_size=max_workers) as session:
+            return fetch_actions(activity, max_workers, session, timeout, progress)
+    urls = [activity.action_url(action[0]) for action in activity.actions]
+    actions = [None] * len(urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(Action, url, session, timeout): i
+            for i, url in enumerate(urls)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            actions[futures[future]] = future.result()
+            if progress is not None:
+                progress(done, len(urls))
+    return actions
+
+
+class ArchivedAction(Action):
+    """Action read back from an ActionArchive, its frame is loaded on first use."""
+
+    def __init__(self, archive, entry) -> None:
+        self.archive = archive
+        self.path = archive.action_path(_entry_key(entry))
+        self.id = entry["id"]
+        self.name = entry["name"]
+        self.meta = entry["meta"]
+        self.description = entry["description"]
+        self.created_at = datetime.fromisoformat(entry["created_at"])
+        self.columns = entry["columns"]
+        self.compressed = entry.get("compressed", False)
+
+    @cached_property
+    def dataframe(self):
+        if self.compressed:
+            with np.load(self.path / "columns.npz") as columns:
+                millis = columns["millis"]
+                values = {name: columns[f"c{i}"] for i, name in enumerate(self.columns)}
+        else:
+            millis = np.load(self.path / "millis.npy", mmap_mode="c")
+            values = {
+                name: np.load(self.path / f"c{i}.npy", mmap_mode="c")
+                for i, name in enumerate(self.columns)
+            }
+        return pd.DataFrame(
+            values,
+            index=pd.Index(millis, name="millis"),
+            columns=pd.Index(self.columns, name="measure"),
+            copy=False,
+        )
+
+
+def _entry_key(entry):
+    # entries written before keys were added live under their id
+    return entry.get("key", str(entry["id"]))
+
+
+class ActionArchive:
+    """Directory of actions stored as column files plus one JSON lines index.
+
+    Actions are keyed by id and creation time, as ids repeat across robot
+    restarts. Uncompressed columns are memory-mapped on load;
+    ``compress=True`` trades that for smaller ``.npz`` files that are
+    decompressed on load.
+    """
+
+    def __init__(self, path="data") -> None:
+        self.path = Path(path)
+        self.index_path = self.path / "index.jsonl"
+
+    def action_path(self, key):
+        return self.path / "actions" / str(key)
+
+    def add(self, action, compress=False):
+        df = action.dataframe
+        path = self.action_path(action.key)
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        columns = {f"c{i}": df[name].to_numpy() for i, name in enumerate(df.columns)}
+        millis = df.index.to_numpy()
+        if compress:
+            np.savez_compressed(path / "columns.npz", millis=millis, **columns)
+        else:
+            np.save(path / "millis.npy", millis)
+            for name, values in columns.items():
+                np.save(path / f"{name}.npy", values)
+
+        entry = {
+            "key": action.key,
+            "id": action.id,
+            "name": action.name,
+            "description": action.description,
+            "meta": action.meta,
+            "created_at": action.created_at.isoformat(),
+            "columns": list(df.columns),
+            "rows": len(df),
+            "compressed": compress,
+        }
+        with self.index_path.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.__dict__.pop("entries", None)
+
+    @cached_property
+    def entries(self):
+        entries = {}
+        if self.index_path.exists():
+            with self.index_path.open() as f:
+                for line in f:
+                    entry = json.loads(line)
+                    # re-archiving an action appends, the last entry wins
+                    entries[_entry_key(entry)] = entry
+        return entries
+
+    @property
+    def index(self):
+        index = pd.DataFrame(
+            [{**entry, "key": key} for key, entry in self.entries.items()],
+            columns=["key", "id", "name", "description", "meta", "created_at", "rows"],
+        )
+        index["created_at"] = pd.to_datetime(index["created_at"])
+        return index.set_index("key")
+
+    def __getitem__(self, key):
+        """The action archived under ``key``, or the only one with id ``key``."""
+        if key not in self.entries:
+            keys = [k for k, entry in self.entries.items() if entry["id"] == key]
+            if len(keys) != 1:
+                raise KeyError(key if not keys else f"id {key} matches {keys}")
+            key = keys[0]
+        return ArchivedAction(self, self.entries[key])
+
+    def __iter__(self):
+        return (self[key] for key in self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"ActionArchive(path={str(self.path)!r},actions={len(self)})"
+
+
+def migrate_pickles(pattern="data/*.pickle", archive="data", compress=False):
+    """One-time conversion of pickled Action dumps into an ActionArchive.
+
+    Returns the paths that could not be unpickled.
+    """
+    archive = ActionArchive(archive)
+    failed = []
+    for path in sorted(Path().glob(pattern)):
+        try:
+            with path.open("rb") as f:
+                action = pickle.load(f)
+        except Exception:
+            failed.append(path)
+            continue
+        archive.add(action, compress=compress)
+    return failed
@@ -0,0 +1,123 @@
+import json
+import pickle
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+import keeper
+
+NAMES = ("plain", "a]b", "x]]y", "[bracketed]", 'quote"]]', "back\\slash]", "end ]")
+
+
+def action_body(seed=0, n=500):
+    rng = np.random.default_rng(seed)
+    traces = [
+        [int(millis), NAMES[rng.integers(len(NAMES))], float(rng.normal())]
+        for millis in np.sort(rng.integers(0, 200, n))
+    ]
+    body = {"id": 1, "name": "a ]] name", "traces": traces, "meta": {"note": "]]"}}
+    return json.dumps(body), body
+
+
+def expected(body):
+    df = pd.DataFrame(body["traces"], columns=["millis", "measure", "value"])
+    df = df.drop_duplicates(["millis", "measure"], keep="last")
+    return df.pivot(index="millis", columns="measure", values="value")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 50, 1 << 20])
+@pytest.mark.parametrize("seed", range(3))
+def test_decode_bracketed_names(chunk_size, seed):
+    text, body = action_body(seed)
+    decoder = keeper.TraceDecoder()
+    for i in range(0, len(text), chunk_size):
+        decoder.feed(text[i : i + chunk_size])
+    rest = decoder.close()
+
+    assert rest == {**body, "traces": []}
+    pd.testing.assert_frame_equal(
+        decoder.dataframe(), expected(body), check_names=False, check_index_type=False
+    )
+
+
+def test_dataframe_twice():
+    text, body = action_body()
+    decoder = keeper.TraceDecoder()
+    decoder.feed(text)
+    decoder.close()
+
+    first = decoder.dataframe()
+    pd.testing.assert_frame_equal(decoder.dataframe(), first)
+    pd.testing.assert_frame_equal(
+        first, expected(body), check_names=False, check_index_type=False
+    )
+
+
+def pickled_action(directory, id, created_at, rows):
+    action = keeper.Action.__new__(keeper.Action)
+    action.id = id
+    action.name = f"action {id}"
+    action.meta = {"description": created_at.isoformat()}
+    action.description = action.meta["description"]
+    action.created_at = created_at
+    action.dataframe = pd.DataFrame(
+        {"speed": np.arange(rows, dtype=np.float64)},
+        index=pd.Index(np.arange(rows, dtype=np.int64) * 20, name="millis"),
+        columns=pd.Index(["speed"], name="measure"),
+    )
+    with open(directory / f"{created_at:%Y-%m-%d-%H-%M}.pickle", "wb") as f:
+        pickle.dump(action, f)
+    return action
+
+
+def test_migrate_repeated_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    created_at = datetime(2021, 5, 3, 15, 39, tzinfo=timezone(timedelta(hours=-4)))
+    first = pickled_action(tmp_path / "data", 9, created_at, 301)
+    second = pickled_action(tmp_path / "data", 9, created_at + timedelta(days=4), 325)
+
+    assert keeper.migrate_pickles() == []
+    archive = keeper.ActionArchive("data")
+    assert len(archive) == 2
+    assert list(archive.index["rows"]) == [301, 325]
+    for action in (first, second):
+        archived = archive[action.key]
+        assert archived.created_at == action.created_at
+        pd.testing.assert_frame_equal(archived.dataframe, action.dataframe)
+    with pytest.raises(KeyError):
+        archive[9]
+
+
+class Session(requests.Session):
+    closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def test_fetch_actions_closes_only_its_session(monkeypatch):
+    created = []
+
+    def make_session(pool_size):
+        created.append(Session())
+        return created[-1]
+
+    monkeypatch.setattr(keeper, "make_session", make_session)
+    monkeypatch.setattr(keeper, "Action", lambda url, session, timeout: (url, session))
+    activity = SimpleNamespace(actions=[[1], [2]], action_url=lambda id: f"action/{id}")
+
+    assert keeper.fetch_actions(activity) == [
+        ("action/1", created[0]),
+        ("action/2", created[0]),
+    ]
+    assert created[0].closed
+
+    session = Session()
+    keeper.fetch_actions(activity, session=session)
+    assert not session.closed
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import tomli
+
+from motion.sim import STATE_DTYPE, state_array
+
+CACHE_DIR = Path(__file__).parent / ".path_cache"
+
+
+def pose(pose_toml):
+    from wpimath.geometry import Pose2d, Rotation2d
+
+    return Pose2d(
+        pose_toml["x"], pose_toml["y"], Rotation2d.fromDegrees(pose_toml["angle"])
+    )
+
+
+def generate_trajectory(trajectory_toml):
+    from wpimath.geometry import Translation2d
+    from wpimath.trajectory import TrajectoryConfig, TrajectoryGenerator
+
+    waypoints = [
+        Translation2d(point["x"], point["y"])
+        for point in trajectory_toml["internal_points"]
+    ]
+    config = TrajectoryConfig(
+        trajectory_toml["max_velocity"], trajectory_toml["max_acceleration"]
+    )
+    config.setReversed(trajectory_toml["is_reversed"])
+    config.setStartVelocity(trajectory_toml["start_velocity"])
+    config.setEndVelocity(trajectory_toml["end_velocity"])
+    return TrajectoryGenerator.generateTrajectory(
+        pose(trajectory_toml["start_pose"]),
+        waypoints,
+        pose(trajectory_toml["end_pose"]),
+        config,
+    )
+
+
+def _generate(content, cache_path):
+    states = state_array(generate_trajectory(tomli.loads(content.decode())).states())
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(f".{os.getpid()}.tmp.npy")
+        np.save(tmp, states)
+        os.replace(tmp, cache_path)
+    return states
+
+
+class TrajectoryPath:
+    """A path TOML and its generated trajectory states, as a STATE_DTYPE array."""
+
+    def __init__(self, path, content, states):
+        self.path = Path(path)
+        self.name = self.path.stem
+        self.content = content
+        self.digest = hashlib.sha1(content).hexdigest()
+        self.states = states
+
+    @cached_property
+    def toml(self):
+        return tomli.loads(self.content.decode())
+
+    @cached_property
+    def arrays(self):
+        return {name: self.states[name] for name in STATE_DTYPE.names}
+
+    @cached_property
+    def trajectory(self):
+        from wpimath.geometry import Pose2d, Rotation2d
+        from wpimath.trajectory import Trajectory
+
+        states = self.states.tolist()
+        return Trajectory(
+            [
+                Trajectory.State(
+                    t,
+                    velocity,
+                    acceleration,
+                    Pose2d(x, y, Rotation2d(heading)),
+                    curvature,
+                )
+                for t, x, y, heading, velocity, acceleration, curvature in states
+            ]
+        )
+
+    @property
+    def start_pose(self):
+        return pose(self.toml["start_pose"])
+
+    @property
+    def end_pose(self):
+        return pose(self.toml["end_pose"])
+
+    @property
+    def target_yaw(self):
+        from wpimath.geometry import Rotation2d
+
+        return Rotation2d.fromDegrees(self.toml.get("target_yaw", 0))
+
+    def total_time(self):
+        return self.states["t"][-1] if len(self.states) else 0.0
+
+    def plot(self, ax=None, step=8, width=0.002):
+        if ax is None:
+            from matplotlib import pyplot
+
+            _, ax = pyplot.subplots()
+        a = self.arrays
+        end_pose, target_yaw = self.end_pose, self.target_yaw
+        ax.quiver(
+            end_pose.X(),
+            end_pose.Y(),
+            target_yaw.cos(),
+            target_yaw.sin(),
+            angles="xy",
+            scale_units="xy",
+            alpha=1,
+            scale=5,
+        )
+        ax.scatter(a["x"], a["y"], alpha=0.5)
+        sampled = slice(None, None, step)
+        ax.quiver(
+            a["x"][sampled],
+            a["y"][sampled],
+            a["velocity"][sampled] * np.cos(a["heading"][sampled]),
+            a["velocity"][sampled] * np.sin(a["heading"][sampled]),
+            angles="xy",
+            scale_units="xy",
+            scale=4,
+            color="r",
+            width=width,
+            alpha=0.35,
+        )
+        ax.set_aspect("equal", "box")
+        return ax
+
+    def __repr__(self):
+        return f"TrajectoryPath({self.name!r},states={len(self.states)})"
+
+
+class PathLibrary:
+    """The path TOMLs of a deploy/paths directory, generated once each.
+
+    Generated states are cached on disk keyed by the SHA-1 of the TOML
+    content, so ``load`` only regenerates paths that changed since the last
+    load. Misses are generated on a process pool.
+    """
+
+    def __init__(self, directory, pattern="*.toml", cache=True, max_workers=None):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.cache = cache
+        self.max_workers = max_workers
+        self.paths = {}
+        self.generated = []
+        self.load()
+
+    def _cache_path(self, digest):
+        return CACHE_DIR / f"{digest}.npy" if self.cache else None
+
+    def load(self):
+        """Rescan the directory, returning the names of regenerated paths."""
+        known = {path.digest: path.states for path in self.paths.values()}
+        paths, misses = {}, {}
+        for file in sorted(self.directory.glob(self.pattern)):
+            content = file.read_bytes()
+            digest = hashlib.sha1(content).hexdigest()
+            states = known.get(digest)
+            if states is None and self.cache and self._cache_path(digest).exists():
+                states = np.load(self._cache_path(digest))
+                if states.dtype != STATE_DTYPE:
+                    states = None  # written before states were STATE_DTYPE arrays
+            if states is None:
+                misses[file] = content
+            paths[file.stem] = (file, content, states)
+
+        if len(misses) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    file: executor.submit(
+                        _generate,
+                        content,
+                        self._cache_path(hashlib.sha1(content).hexdigest()),
+                    )
+                    for file, content in misses.items()
+                }
+                generated = {file: future.result() for file, future in futures.items()}
+        else:
+            generated = {
+                file: _generate(
+                    content, self._cache_path(hashlib.sha1(content).hexdigest())
+                )
+                for file, content in misses.items()
+            }
+
+        self.paths = {
+            name: TrajectoryPath(
+                file, content, states if states is not None else generated[file]
+            )
+            for name, (file, content, states) in paths.items()
+        }
+        self.generated = [file.stem for file in misses]
+        return self.generated
+
+    def plot(self, names=None, ax=None, **kwargs):
+        if ax is None:
+            from matplotlib import pyplot
+
+            _, ax = pyplot.subplots()
+        for name in names if names is not None else self.paths:
+            self.paths[name].plot(ax=ax, **kwargs)
+        return ax
+
+    @classmethod
+    def prune_cache(cls):
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def __getitem__(self, name):
+        return self.paths[name]
+
+    def __iter__(self):
+        return iter(self.paths.values())
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __repr__(self):
+        return f"PathLibrary({str(self.directory)!r},paths={len(self)})"
@@ -0,0 +1,459 @@
+"""Live telemetry streaming from the robot's telemetry server.
+
+The client sends ``Subscription.to_json()`` to the server and then receives
+one JSON frame per sample, ``{"timestamp": <millis>, "data": [...]}``, with
+``data`` in subscription order. Over UDP each datagram is a frame. Over TCP
+the subscription and the frames are each one line of compact JSON.
+"""
+import asyncio
+import json
+import socket
+
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from motion.inventory import column_names
+from motion.plot import fill_verts, minmax_indices
+from motion.telemetry import TrajectoryTelemetry
+
+
+def _envelope(x, y1, y2, buckets):
+    """The area between ``y1`` and ``y2`` as its lowest and highest values in
+    each of ``buckets`` runs of samples, at the first ``x`` of the run.
+    """
+    n = len(x)
+    if n <= 2 * buckets:
+        return x, y1, y2
+    size = -(-n // buckets)
+    count = -(-n // size)
+    pad = (0, count * size - n)
+    # fmin and fmax skip NaN, so the padding and gaps never win a bucket
+    low = np.pad(np.fmin(y1, y2), pad, constant_values=np.nan).reshape(count, size)
+    high = np.pad(np.fmax(y1, y2), pad, constant_values=np.nan).reshape(count, size)
+    return x[::size], np.fmin.reduce(low, axis=1), np.fmax.reduce(high, axis=1)
+
+
+class RingBuffer:
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((width, capacity), np.nan)
+        self.count = 0
+
+    def append(self, timestamp, data):
+        i = self.count % self.capacity
+        self.timestamps[i] = timestamp
+        self.values[:, i] = data
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def order(self, last=None):
+        """Buffer positions of the newest ``last`` samples, oldest first."""
+        n = len(self) if last is None else min(last, len(self))
+        return np.arange(self.count - n, self.count) % self.capacity
+
+    def window(self, last=None):
+        order = self.order(last)
+        return self.timestamps[order], self.values[:, order]
+
+    def since(self, timestamp):
+        """Number of newest samples recorded at or after ``timestamp``."""
+        timestamps = self.timestamps[self.order()]
+        return len(timestamps) - timestamps.searchsorted(timestamp)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client):
+        self.client = client
+
+    def connection_made(self, transport):
+        sock = transport.get_extra_info("socket")
+        # a deep receive queue rides out scheduling hiccups without dropping frames
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        transport.sendto(self.client.subscription.to_json().encode())
+
+    def datagram_received(self, data, addr):
+        self.client.receive(data)
+
+
+class TelemetryClient:
+    def __init__(
+        self,
+        subscription,
+        host="127.0.0.1",
+        port=5801,
+        protocol="udp",
+        capacity=60_000,
+    ):
+        self.subscription = subscription
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.columns = subscription.columns()
+        self.buffer = RingBuffer(capacity, len(self.columns))
+        # raw ring views per measure, use buffer.order() for time order
+        self.buffers = {
+            (measure["itemId"], measure["measurementId"]): self.buffer.values[i]
+            for i, measure in enumerate(subscription)
+        }
+        self.errors = 0
+        self._transport = None
+        self._reader = None
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        if self.protocol == "udp":
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), remote_addr=(self.host, self.port)
+            )
+        elif self.protocol == "tcp":
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            writer.write(self.subscription.to_json(indent=None).encode() + b"\n")
+            await writer.drain()
+            self._transport = writer
+            self._reader = asyncio.create_task(self._read_lines(reader))
+        else:
+            raise ValueError(f"unknown protocol {self.protocol!r}")
+
+    async def _read_lines(self, reader):
+        while line := await reader.readline():
+            self.receive(line)
+
+    def receive(self, payload):
+        try:
+            frame = json.loads(payload)
+            self.buffer.append(frame["timestamp"], frame["data"])
+        except (ValueError, KeyError, TypeError):
+            self.errors += 1
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def frame(self, last=None):
+        timestamps, values = self.buffer.window(last)
+        return pd.DataFrame(
+            {"timestamp": timestamps, **dict(zip(self.columns, values))}
+        )
+
+    def latest(self):
+        return self.buffer.timestamps[(self.buffer.count - 1) % self.buffer.capacity]
+
+    def telemetry(self, last=None, **kwargs):
+        """Snapshot of the received samples as a TrajectoryTelemetry."""
+        return TrajectoryTelemetry(self.frame(last), **kwargs)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def __repr__(self):
+        return f"TelemetryClient(host={self.host!r},port={self.port!r},protocol={self.protocol!r},received={self.buffer.count})"
+
+
+class _ReplayProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if json.loads(data).get("type") != "start":
+            return
+        send = lambda frame: self.transport.sendto(frame, addr)
+        self.server.replays.append(asyncio.create_task(self.server.replay(send)))
+
+
+class FakeTelemetryServer:
+    """Replays a recorded CSV log to subscribing clients.
+
+    Frames follow ``subscription`` order, with NaN for measures missing from
+    the log. ``speed`` scales the recorded sample timing, 0 replays flat out.
+    """
+
+    def __init__(
+        self, csv, subscription, host="127.0.0.1", port=0, protocol="udp", speed=1.0
+    ):
+        self.df = pd.read_csv(csv)
+        self.columns = [
+            next((name for name in names if name in self.df), names[0])
+            for names in (column_names(*item) for item in subscription.items())
+        ]
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.speed = speed
+        self.replays = []
+        self._server = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.protocol == "udp":
+            self._server, _ = await loop.create_datagram_endpoint(
+                lambda: _ReplayProtocol(self), local_addr=(self.host, self.port)
+            )
+            self.port = self._server.get_extra_info("sockname")[1]
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_tcp, self.host, self.port
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _handle_tcp(self, reader, writer):
+        # the subscription is sent as one line of compact JSON
+        await reader.readline()
+
+        def send(frame):
+            writer.write(frame + b"\n")
+
+        try:
+            await self.replay(send, drain=writer.drain)
+        finally:
+            writer.close()
+
+    def frames(self, columns):
+        data = self.df.reindex(columns=columns).to_numpy()
+        for timestamp, row in zip(self.df["timestamp"], data):
+            frame = {"timestamp": int(timestamp), "data": row.tolist()}
+            yield timestamp, json.dumps(frame).encode()
+
+    async def replay(self, send, drain=None):
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        first = self.df["timestamp"].iloc[0]
+        for i, (timestamp, frame) in enumerate(self.frames(self.columns)):
+            if self.speed:
+                # schedule against the log's clock so sleep jitter doesn't accumulate
+                delay = t0 + (timestamp - first) / 1000 / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % 64 == 0:
+                await asyncio.sleep(0)
+            send(frame)
+            if drain is not None:
+                await drain()
+
+    async def close(self):
+        for replay in self.replays:
+            replay.cancel()
+        self._server.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class LivePlot:
+    """Live, blitted version of a TrajectoryTelemetry plot.
+
+    Artists are created once and only their data is replaced on ``update()``.
+    Time plots are drawn against milliseconds before the newest sample, so the
+    axes stay fixed and only the last ``window`` milliseconds are redrawn.
+
+    Each plotted series is evaluated once per sample, on the samples received
+    since the previous update, and kept in a ring aligned with the client's
+    buffer, so series must only depend on their own sample. Lines are drawn
+    from the min/max of each pixel column of the window, and fills from the
+    envelope of their two series in each pixel column.
+    """
+
+    def __init__(self, client, kind, window=60_000, ax=None, ylim=None, **kwargs):
+        self.client = client
+        self.kind = kind
+        self.window = window
+        self.kwargs = kwargs
+
+        if ax is None:
+            _, ax = plt.subplots()
+        self.ax = ax
+        self.axes = [ax]
+        self.canvas = ax.figure.canvas
+        self.series = []
+        self.lines = []
+        self.fills = []
+        getattr(self, f"_setup_{kind}")(**kwargs)
+        self.values = np.full((len(self.series), client.buffer.capacity), np.nan)
+        self.seen = 0
+
+        ax.grid()
+        ax.legend(handles=[line for line, _, _ in self.lines], loc="upper left")
+        if kind != "trajectory":
+            ax.set_xlim(-window, 0)
+            ax.set_xlabel("milliseconds")
+        if ylim is not None:
+            ax.set_ylim(*ylim)
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.draw()
+
+    def _series(self, fn):
+        if fn not in self.series:
+            self.series.append(fn)
+        return self.series.index(fn)
+
+    def _line(self, y, x=None, ax=None, **kwargs):
+        ax = self.ax if ax is None else ax
+        (line,) = ax.plot([], [], animated=True, **kwargs)
+        self.lines.append(
+            (line, None if x is None else self._series(x), self._series(y))
+        )
+
+    def _fill(self, y1, y2, **kwargs):
+        # an edge adds a stroke over every vertex of the fill for nothing visible
+        poly = self.ax.fill_between([], [], [], animated=True, linewidth=0, **kwargs)
+        self.fills.append((poly, self._series(y1), self._series(y2)))
+
+    def _setup_trajectory(self):
+        self._line(
+            lambda t: t.df["traj_y"], x=lambda t: t.df["traj_x"], label="trajectory"
+        )
+        self._line(
+            lambda t: t.df["odom_y"], x=lambda t: t.df["odom_x"], label="odometry"
+        )
+        self.ax.set_xlabel("meters")
+        self.ax.set_ylabel("meters")
+
+    def _setup_error(self):
+        self._line(lambda t: t.derived["x_error"], label="x error")
+        self._line(lambda t: t.derived["y_error"], label="y error")
+        self.ax.set_ylabel("meters")
+
+    def _setup_velocity(
+        self, trajectory=True, controller=True, setpoint=True, drive=True
+    ):
+        linestyle = ":" if controller else "-"
+        traj_vel = lambda t: t.df["traj_vel"]
+        hc_vel = lambda t: t.derived["hc_speed"]
+        setpoint_mps = lambda t: t.derived["setpoint_mps"]
+        drive_mps = lambda t: t.derived["drive_mps"]
+
+        if trajectory:
+            self._line(traj_vel, label="trajectory")
+        if controller:
+            self._line(hc_vel, label="holonomic controller", color="orange")
+        if setpoint:
+            self._line(
+                setpoint_mps, label="talon setpoint", color="green", linestyle=linestyle
+            )
+        if drive:
+            self._line(
+                drive_mps, label="talon velocity", color="purple", linestyle=linestyle
+            )
+        if controller and trajectory:
+            self._fill(traj_vel, hc_vel, color="orange", alpha=0.2)
+        if setpoint and controller:
+            self._fill(setpoint_mps, hc_vel, color="green", alpha=0.1)
+        if setpoint and drive:
+            self._fill(drive_mps, setpoint_mps, color="purple", alpha=0.1)
+        self.ax.set_ylabel("meters/second")
+
+    def _setup_yaw(self, gyro=True, controller=True):
+        self._line(lambda t: t.df["odom_deg"], label="odometry")
+        if gyro:
+            self._line(lambda t: t.df["gyro_deg"], label="gyro")
+        if controller:
+            omega = self.ax.twinx()
+            self.axes.append(omega)
+            self._line(
+                lambda t: t.df["hc_omega"],
+                ax=omega,
+                label="controller omega",
+                color="green",
+            )
+        self.ax.set_ylabel("degrees")
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist, *_ in self.fills + self.lines:
+            artist.axes.draw_artist(artist)
+
+    def _rescale(self):
+        """Grow the data limits when new samples fall outside them."""
+        rescaled = False
+        for ax in self.axes:
+            artists = [line for line, _, _ in self.lines if line.axes is ax]
+            ys = np.concatenate([line.get_ydata() for line in artists])
+            ys = ys[np.isfinite(ys)]
+            if ys.size == 0:
+                continue
+            lo, hi = ax.get_ylim()
+            if ys.min() < lo or ys.max() > hi:
+                pad = 0.1 * max(ys.max() - ys.min(), 1e-3)
+                ax.set_ylim(min(lo, ys.min() - pad), max(hi, ys.max() + pad))
+                rescaled = True
+            if self.kind == "trajectory":
+                xs = np.concatenate([line.get_xdata() for line in artists])
+                xs = xs[np.isfinite(xs)]
+                lo, hi = ax.get_xlim()
+                if xs.size and (xs.min() < lo or xs.max() > hi):
+                    pad = 0.1 * max(xs.max() - xs.min(), 1e-3)
+                    ax.set_xlim(min(lo, xs.min() - pad), max(hi, xs.max() + pad))
+                    rescaled = True
+        return rescaled
+
+    def _evaluate(self):
+        """Evaluate the series over the samples received since the last update."""
+        buffer = self.client.buffer
+        new = min(buffer.count - self.seen, buffer.capacity)
+        if new > 0:
+            t = self.client.telemetry(last=new)
+            positions = buffer.order(new)
+            for k, fn in enumerate(self.series):
+                self.values[k, positions] = np.asarray(fn(t))
+        self.seen = buffer.count
+
+    def update(self):
+        if len(self.client) == 0:
+            return
+
+        self._evaluate()
+        buffer = self.client.buffer
+        latest = self.client.latest()
+        positions = buffer.order(buffer.since(latest - self.window))
+        values = self.values[:, positions]
+        x = buffer.timestamps[positions] - latest
+        # each artist keeps the extremes of its own series per pixel column
+        buckets = max(1, int(self.ax.bbox.width))
+        for line, xs, ys in self.lines:
+            if xs is None:
+                i = minmax_indices([values[ys]], buckets)
+                line.set_data(x[i], values[ys, i])
+            else:
+                i = minmax_indices([values[xs], values[ys]], buckets)
+                line.set_data(values[xs, i], values[ys, i])
+        for poly, y1, y2 in self.fills:
+            poly.set_verts([fill_verts(*_envelope(x, values[y1], values[y2], buckets))])
+
+        if self._rescale() or self.background is None:
+            # limits changed, so the cached background is stale
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_artists()
+        self.canvas.blit(self.ax.figure.bbox)
+        self.canvas.flush_events()
+
+    async def animate(self, fps=30):
+        while True:
+            self.update()
+            await asyncio.sleep(1 / fps)
@@ -0,0 +1,199 @@
+"""Render the figure-8.ipynb plots for every run in a directory of logs.
+
+    python report.py data -o report
+
+Each run gets a directory of plot_trajectory, plot_velocity, plot_error and
+plot_yaw figures, rendered headless across a process pool, and index.html
+links them all. A run is skipped when its log and the rendering parameters
+are unchanged since the last build.
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib import pyplot as plt
+
+from motion.telemetry import TrajectoryTelemetry
+
+PLOTS = {
+    "trajectory": ("plot_trajectory", {}),
+    "velocity": ("plot_velocity", {"controller": True}),
+    "error": ("plot_error", {}),
+    "yaw": ("plot_yaw", {"gyro": True}),
+}
+MANIFEST = "manifest.json"
+
+
+def render_key(path, params):
+    stat = Path(path).stat()
+    key = json.dumps(
+        {
+            "source": str(Path(path).resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "params": params,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def read_manifest(directory):
+    try:
+        with open(Path(directory) / MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def render_run(path, directory, params):
+    """Save the four figures of one run and its manifest into ``directory``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    key = render_key(path, params)
+    manifest = {"key": key, "source": str(path), "figures": {}, "error": None}
+    try:
+        t = TrajectoryTelemetry(path, **params["telemetry"])
+        interval = t.interval
+        manifest["summary"] = {
+            "start": int(t.start),
+            "end": int(t.end),
+            "segments": len(t.segments),
+            **{k: float(v) for k, v in t.end_pose().iloc[0].items()},
+        }
+        for name, (method, kwargs) in PLOTS.items():
+            fig, ax = plt.subplots(figsize=params["figsize"])
+            if name == "trajectory":
+                ax.set_aspect("equal", "datalim")
+            getattr(t, method)(interval=interval, ax=ax, **kwargs)
+            file = f"{name}.{params['format']}"
+            fig.savefig(directory / file, dpi=params["dpi"])
+            plt.close(fig)
+            manifest["figures"][name] = file
+    except Exception as e:  # a bad log becomes a row in the index, not a failed build
+        manifest["error"] = f"{type(e).__name__}: {e}"
+    with open(directory / MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def build_report(
+    logs,
+    output="report",
+    pattern="tcr-*.csv",
+    format="png",
+    dpi=100,
+    figsize=(16, 8),
+    max_workers=None,
+    force=False,
+    **telemetry_kwargs,
+):
+    """Render every changed run under ``logs`` and rewrite the index.
+
+    Returns the names of the runs that were rendered.
+    """
+    output = Path(output)
+    params = {
+        "format": format,
+        "dpi": dpi,
+        "figsize": list(figsize),
+        "telemetry": telemetry_kwargs,
+    }
+    paths = sorted(Path(logs).glob(pattern))
+    manifests, stale = {}, []
+    for path in paths:
+        manifest = read_manifest(output / path.stem)
+        if not force and manifest and manifest["key"] == render_key(path, params):
+            manifests[path.stem] = manifest
+        else:
+            stale.append(path)
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                path.stem: executor.submit(render_run, path, output / path.stem, params)
+                for path in stale
+            }
+            for name, future in futures.items():
+                manifests[name] = future.result()
+
+    write_index(output, [(path.stem, manifests[path.stem]) for path in paths])
+    return [path.stem for path in stale]
+
+
+def write_index(output, runs):
+    rows = []
+    for name, manifest in runs:
+        name = html.escape(name)
+        if manifest["error"]:
+            cells = f'<td colspan="{len(PLOTS)}">{html.escape(manifest["error"])}</td>'
+        else:
+            cells = "".join(
+                f'<td><a href="{name}/{file}"><img src="{name}/{file}" '
+                f'loading="lazy"></a></td>'
+                for file in manifest["figures"].values()
+            )
+        summary = manifest.get("summary", {})
+        details = "<br>".join(
+            f"{html.escape(k)} = {v:.3f}" if isinstance(v, float) else f"{k} = {v}"
+            for k, v in summary.items()
+        )
+        rows.append(f"<tr><th>{name}<br><small>{details}</small></th>{cells}</tr>")
+    headers = "".join(f"<th>{name}</th>" for name in PLOTS)
+    page = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Trajectory runs</title>
+<style>
+body {{ font-family: sans-serif; }}
+th {{ text-align: left; vertical-align: top; white-space: nowrap; }}
+img {{ width: 360px; }}
+</style>
+</head>
+<body>
+<table>
+<tr><th>run</th>{headers}</tr>
+{os.linesep.join(rows)}
+</table>
+</body>
+</html>
+"""
+    output.mkdir(parents=True, exist_ok=True)
+    (output / "index.html").write_text(page)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", help="directory of telemetry CSV logs")
+    parser.add_argument("-o", "--output", default="report")
+    parser.add_argument("-p", "--pattern", default="tcr-*.csv")
+    parser.add_argument("-f", "--format", choices=("png", "svg"), default="png")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="render every run")
+    args = parser.parse_args(argv)
+
+    rendered = build_report(
+        args.logs,
+        output=args.output,
+        pattern=args.pattern,
+        format=args.format,
+        dpi=args.dpi,
+        max_workers=args.workers,
+        force=args.force,
+    )
+    print(f"rendered {len(rendered)} runs into {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()